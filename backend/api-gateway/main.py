@@ -250,6 +250,11 @@ async def market_data_routes(request: Request, path: str, user: Dict[str, Any] =
     """Market data service routes"""
     return await route_request(request, "market-data", f"/api/v1/market-data/{path}", user)
 
+@app.api_route("/api/v1/watchlists/{path:path}", methods=["GET", "POST"])
+async def watchlist_quote_routes(request: Request, path: str, user: Dict[str, Any] = Depends(get_current_user)):
+    """Watchlist quote routes, served by the market data service for the authenticated user"""
+    return await route_request(request, "market-data", f"/api/v1/watchlists/{path}", user)
+
 @app.api_route("/api/v1/risk/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def risk_routes(request: Request, path: str, user: Dict[str, Any] = Depends(get_current_user)):
     """Risk management service routes"""
@@ -0,0 +1,111 @@
+"""
+Market Data Service Adjustments - Casa de Valores Information System
+Cumulative split and dividend adjustment factors applied to price series by vectorized lookup
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+ACTION_TYPES = ("dividend", "split", "merger", "spinoff")
+
+def action_factor(action: Dict[str, Any]) -> float:
+    """Backward price factor applied to every price before the action's ex-date
+
+    Splits use details.ratio (new shares per old share, so 4 for a 4:1 split
+    and 0.1 for a 1:10 reverse split). Cash dividends use
+    1 - amount / reference_price, where reference_price is the last close
+    before the ex-date. Other actions only adjust when they carry an explicit
+    details.adjustment_factor.
+    """
+    details = action.get("details") or {}
+    if details.get("adjustment_factor") is not None:
+        return float(details["adjustment_factor"])
+    if action["action_type"] == "split":
+        return 1.0 / float(details["ratio"])
+    if action["action_type"] == "dividend":
+        return 1.0 - float(details["amount"]) / float(action["reference_price"])
+    return 1.0
+
+def _volume_factor(action: Dict[str, Any]) -> float:
+    # Share counts scale with splits only
+    if action["action_type"] == "split":
+        return float((action.get("details") or {})["ratio"])
+    return 1.0
+
+class AdjustmentTable:
+    """Ex-dates with the cumulative factors in force before each of them
+
+    price_factors[i] is the product of the factors of actions i..n-1, with a
+    trailing 1.0 for prices on or after the last ex-date, so the factor for
+    any timestamp is a single searchsorted into ex_dates.
+    """
+
+    __slots__ = ("symbol", "ex_dates", "price_factors", "volume_factors", "version")
+
+    def __init__(self, symbol: str, ex_dates: np.ndarray, price_factors: np.ndarray,
+                 volume_factors: np.ndarray, version: int = 0):
+        self.symbol = symbol
+        self.ex_dates = ex_dates
+        self.price_factors = price_factors
+        self.volume_factors = volume_factors
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.ex_dates)
+
+    @classmethod
+    def identity(cls, symbol: str) -> "AdjustmentTable":
+        return cls(symbol, np.array([], dtype="datetime64[us]"), np.ones(1), np.ones(1))
+
+    @classmethod
+    def build(cls, symbol: str, actions: List[Dict[str, Any]], version: int = 0) -> "AdjustmentTable":
+        actions = sorted(actions, key=lambda action: action["ex_date"])
+        factors = np.array([action_factor(action) for action in actions] + [1.0])
+        volume = np.array([_volume_factor(action) for action in actions] + [1.0])
+        # Reverse cumulative product: factor before ex-date i includes every later action too
+        return cls(
+            symbol,
+            np.array([action["ex_date"] for action in actions], dtype="datetime64[us]"),
+            np.cumprod(factors[::-1])[::-1],
+            np.cumprod(volume[::-1])[::-1],
+            version,
+        )
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "AdjustmentTable":
+        return cls(
+            document["symbol"],
+            np.array(document["ex_dates"], dtype="datetime64[us]"),
+            np.array(document["price_factors"], dtype=float),
+            np.array(document["volume_factors"], dtype=float),
+            document.get("version", 0),
+        )
+
+    def to_document(self, updated_at: Optional[datetime] = None) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "ex_dates": self.ex_dates.astype(datetime).tolist(),
+            "price_factors": self.price_factors.tolist(),
+            "volume_factors": self.volume_factors.tolist(),
+            "version": self.version,
+            "updated_at": updated_at or datetime.utcnow(),
+        }
+
+    def _positions(self, timestamps) -> np.ndarray:
+        timestamps = np.asarray(timestamps).astype("datetime64[us]")
+        return np.searchsorted(self.ex_dates, timestamps, side="right")
+
+    def price_factors_at(self, timestamps) -> np.ndarray:
+        if not len(self.ex_dates):
+            return np.ones(len(timestamps))
+        return self.price_factors[self._positions(timestamps)]
+
+    def volume_factors_at(self, timestamps) -> np.ndarray:
+        if not len(self.ex_dates):
+            return np.ones(len(timestamps))
+        return self.volume_factors[self._positions(timestamps)]
+
+    def adjust_prices(self, prices, timestamps) -> np.ndarray:
+        return np.asarray(prices, dtype=float) * self.price_factors_at(timestamps)
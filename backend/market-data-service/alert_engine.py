@@ -0,0 +1,164 @@
+"""
+Market Data Service Alert Engine - Casa de Valores Information System
+Price-indexed market alerts evaluated by bisection on every tick
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+CONDITIONS = ("above", "below", "equals")
+
+class _ThresholdBook:
+    """Alert thresholds for one symbol and condition, sorted by target value"""
+
+    __slots__ = ("targets", "ids")
+
+    def __init__(self):
+        self.targets: List[float] = []
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def add(self, target: float, alert_id: str):
+        index = bisect_right(self.targets, target)
+        self.targets.insert(index, target)
+        self.ids.insert(index, alert_id)
+
+    def remove(self, target: float, alert_id: str) -> bool:
+        index = bisect_left(self.targets, target)
+        while index < len(self.targets) and self.targets[index] == target:
+            if self.ids[index] == alert_id:
+                del self.targets[index]
+                del self.ids[index]
+                return True
+            index += 1
+        return False
+
+    def pop_range(self, lo: int, hi: int) -> List[str]:
+        if lo >= hi:
+            return []
+        popped = self.ids[lo:hi]
+        del self.targets[lo:hi]
+        del self.ids[lo:hi]
+        return popped
+
+class AlertEngine:
+    """In-memory index of active alerts; MongoDB remains the system of record"""
+
+    def __init__(self, equals_tolerance: float = 0.01, max_retired: int = 100000):
+        self.equals_tolerance = equals_tolerance
+        self.max_retired = max_retired
+        self._books: Dict[str, Dict[str, _ThresholdBook]] = {}
+        self._alerts: Dict[str, Dict[str, Any]] = {}
+        # Triggered in memory but not yet persisted as inactive
+        self.pending_ids: Set[str] = set()
+        # Recently triggered or deleted ids, so late change events cannot revive them
+        self._retired: "OrderedDict[str, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def __contains__(self, alert_id: str) -> bool:
+        return alert_id in self._alerts
+
+    def _retire(self, alert_id: str):
+        self._retired[alert_id] = None
+        self._retired.move_to_end(alert_id)
+        while len(self._retired) > self.max_retired:
+            self._retired.popitem(last=False)
+
+    def load(self, alerts: Iterable[Dict[str, Any]]):
+        """Replace the index with the given active alerts (sorted once, not inserted one by one)"""
+        grouped: Dict[str, Dict[str, List]] = {}
+        indexed: Dict[str, Dict[str, Any]] = {}
+        for alert in alerts:
+            alert_id = str(alert["_id"])
+            if alert_id in self.pending_ids or alert_id in self._retired:
+                continue
+            if alert.get("condition") not in CONDITIONS:
+                continue
+            indexed[alert_id] = alert
+            grouped.setdefault(alert["symbol"], {}).setdefault(alert["condition"], []).append(
+                (float(alert["target_value"]), alert_id)
+            )
+
+        books: Dict[str, Dict[str, _ThresholdBook]] = {}
+        for symbol, conditions in grouped.items():
+            for condition, entries in conditions.items():
+                entries.sort()
+                book = _ThresholdBook()
+                book.targets = [target for target, _ in entries]
+                book.ids = [alert_id for _, alert_id in entries]
+                books.setdefault(symbol, {})[condition] = book
+
+        self._books = books
+        self._alerts = indexed
+
+    def copy(self) -> "AlertEngine":
+        """Independent engine over the same active alerts; triggering in it leaves this one untouched"""
+        engine = AlertEngine(self.equals_tolerance, self.max_retired)
+        engine.load(self._alerts.values())
+        return engine
+
+    def add(self, alert: Dict[str, Any]):
+        alert_id = str(alert["_id"])
+        if alert_id in self._alerts or alert_id in self._retired:
+            return
+        if alert.get("condition") not in CONDITIONS:
+            return
+        self._alerts[alert_id] = alert
+        book = self._books.setdefault(alert["symbol"], {}).setdefault(alert["condition"], _ThresholdBook())
+        book.add(float(alert["target_value"]), alert_id)
+
+    def remove(self, alert_id: str, retire: bool = True) -> Optional[Dict[str, Any]]:
+        if retire:
+            self._retire(alert_id)
+        alert = self._alerts.pop(alert_id, None)
+        if alert is None:
+            return None
+        book = self._books.get(alert["symbol"], {}).get(alert["condition"])
+        if book is not None:
+            book.remove(float(alert["target_value"]), alert_id)
+        return alert
+
+    def evaluate(self, symbol: str, price: float) -> List[Dict[str, Any]]:
+        """Remove and return exactly the alerts crossed by this price"""
+        books = self._books.get(symbol)
+        if not books:
+            return []
+
+        triggered_ids: List[str] = []
+
+        above = books.get("above")
+        if above:
+            # price > target: every target strictly below the price
+            triggered_ids += above.pop_range(0, bisect_left(above.targets, price))
+
+        below = books.get("below")
+        if below:
+            # price < target: every target strictly above the price
+            triggered_ids += below.pop_range(bisect_right(below.targets, price), len(below))
+
+        equals = books.get("equals")
+        if equals:
+            lo = bisect_right(equals.targets, price - self.equals_tolerance)
+            hi = bisect_left(equals.targets, price + self.equals_tolerance)
+            triggered_ids += equals.pop_range(lo, hi)
+
+        triggered = []
+        for alert_id in triggered_ids:
+            alert = self._alerts.pop(alert_id, None)
+            if alert is not None:
+                self.pending_ids.add(alert_id)
+                self._retire(alert_id)
+                triggered.append(alert)
+        return triggered
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active_alerts": len(self._alerts),
+            "symbols": len(self._books),
+            "pending_triggers": len(self.pending_ids),
+        }
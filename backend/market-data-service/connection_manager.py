@@ -0,0 +1,221 @@
+"""
+Market Data Service Connection Manager - Casa de Valores Information System
+WebSocket fan-out with per-client send queues and last-value conflation
+"""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from fastapi import WebSocket
+
+from wire_format import ENCODING_JSON, ENCODING_MSGPACK, MSGPACK_SUBPROTOCOL, TickFrame
+
+logger = logging.getLogger(__name__)
+
+class ClientConnection:
+    """One WebSocket client with a bounded outbound queue drained by its own task"""
+
+    def __init__(self, websocket: WebSocket, max_pending: int = 1000, encoding: str = ENCODING_JSON):
+        self.websocket = websocket
+        self.max_pending = max_pending
+        self.encoding = encoding
+        self.sent = 0
+        self.conflated = 0
+        self.dropped = 0
+        self.closed = False
+        self.symbols: Set[str] = set()
+        # Sequence of the last tick frame sent per symbol, for delta encoding
+        self.last_seq: Dict[str, int] = {}
+        # Conflation key -> payload; a newer payload for a queued key replaces it in place
+        self._pending: "OrderedDict[str, Union[str, TickFrame]]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, on_error):
+        self._task = asyncio.create_task(self._sender(on_error))
+
+    def stop(self):
+        self.closed = True
+        self._pending.clear()
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def enqueue(self, key: str, payload: Union[str, TickFrame]):
+        """Queue a payload without waiting for the socket"""
+        if self.closed:
+            return
+
+        if key in self._pending:
+            # The client fell behind: only the latest value for this key is kept
+            self._pending[key] = payload
+            self.conflated += 1
+        else:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._pending[key] = payload
+        self._wakeup.set()
+
+    async def _sender(self, on_error):
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._pending:
+                    _, payload = self._pending.popitem(last=False)
+                    if not isinstance(payload, TickFrame):
+                        await self.websocket.send_text(payload)
+                    elif self.encoding == ENCODING_MSGPACK:
+                        data = payload.binary(self.last_seq.get(payload.symbol))
+                        self.last_seq[payload.symbol] = payload.seq
+                        await self.websocket.send_bytes(data)
+                    else:
+                        await self.websocket.send_text(payload.text)
+                    self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"Dropping WebSocket client after send failure: {e}")
+            on_error(self)
+
+class ConnectionManager:
+    def __init__(self, max_pending: int = 1000, max_symbols_per_connection: int = 50):
+        self.max_pending = max_pending
+        self.max_symbols_per_connection = max_symbols_per_connection
+        # symbol -> subscribed clients; one client may appear under many symbols
+        self.active_connections: Dict[str, Dict[WebSocket, ClientConnection]] = {}
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        # Process-wide symbol ids and the latest frame per symbol for binary clients
+        self.symbol_ids: Dict[str, int] = {}
+        self._last_frames: Dict[str, TickFrame] = {}
+        self.messages_conflated = 0
+        self.messages_dropped = 0
+
+    async def connect(self, websocket: WebSocket) -> ClientConnection:
+        # Binary encoding is opt-in via ?encoding=msgpack or the msgpack subprotocol
+        requested = websocket.headers.get("sec-websocket-protocol", "")
+        subprotocols = [proto.strip() for proto in requested.split(",") if proto.strip()]
+        if MSGPACK_SUBPROTOCOL in subprotocols:
+            encoding = ENCODING_MSGPACK
+            await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL)
+        else:
+            encoding = websocket.query_params.get("encoding", ENCODING_JSON)
+            if encoding not in (ENCODING_JSON, ENCODING_MSGPACK):
+                encoding = ENCODING_JSON
+            await websocket.accept()
+
+        client = ClientConnection(websocket, self.max_pending, encoding)
+        client.start(self.disconnect)
+        self.clients[websocket] = client
+        logger.info("Client connected to market data feed")
+        return client
+
+    def subscribe(self, client: ClientConnection, symbols: Iterable[str]) -> List[str]:
+        """Add symbols to a client's subscription; returns the newly added ones"""
+        added = [symbol for symbol in dict.fromkeys(symbols) if symbol not in client.symbols]
+        if len(client.symbols) + len(added) > self.max_symbols_per_connection:
+            raise ValueError(
+                f"Maximum {self.max_symbols_per_connection} symbols allowed per connection"
+            )
+
+        for symbol in added:
+            client.symbols.add(symbol)
+            self.active_connections.setdefault(symbol, {})[client.websocket] = client
+        return added
+
+    def unsubscribe(self, client: ClientConnection, symbols: Iterable[str]):
+        for symbol in symbols:
+            if symbol not in client.symbols:
+                continue
+            client.symbols.discard(symbol)
+            client.last_seq.pop(symbol, None)
+            clients = self.active_connections.get(symbol)
+            if clients is not None:
+                clients.pop(client.websocket, None)
+                if not clients:
+                    del self.active_connections[symbol]
+
+    def disconnect(self, client: ClientConnection):
+        if self.clients.pop(client.websocket, None) is None:
+            return
+
+        self.unsubscribe(client, list(client.symbols))
+        client.stop()
+        self.messages_conflated += client.conflated
+        self.messages_dropped += client.dropped
+        logger.info("Client disconnected from market data feed")
+
+    def symbol_id(self, symbol: str) -> int:
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbol_ids) + 1
+            self.symbol_ids[symbol] = symbol_id
+        return symbol_id
+
+    def subscription_message(self, client: ClientConnection) -> str:
+        message = {"type": "subscriptions", "symbols": sorted(client.symbols)}
+        if client.encoding == ENCODING_MSGPACK:
+            message["symbol_ids"] = {symbol: self.symbol_id(symbol) for symbol in message["symbols"]}
+        return json.dumps(message)
+
+    def enqueue_latest(self, client: ClientConnection, symbol: str) -> bool:
+        """Queue the last broadcast frame for a symbol, if there has been one"""
+        frame = self._last_frames.get(symbol)
+        if frame is None:
+            return False
+        client.enqueue(f"market_data:{symbol}", frame)
+        return True
+
+    def enqueue_snapshot(self, client: ClientConnection, market_data: dict):
+        """Queue a quote from outside the broadcast sequence (always a full frame)"""
+        symbol = market_data["symbol"]
+        frame = TickFrame(symbol, self.symbol_id(symbol), 0, market_data)
+        client.enqueue(f"market_data:{symbol}", frame)
+
+    async def broadcast_market_data(self, market_data: dict, symbol: str):
+        """Queue a tick for every subscriber, encoding it at most once per format"""
+        previous = self._last_frames.get(symbol)
+        frame = TickFrame(
+            symbol,
+            self.symbol_id(symbol),
+            previous.seq + 1 if previous else 1,
+            market_data,
+            previous.fields if previous else None,
+        )
+        self._last_frames[symbol] = frame
+
+        clients = self.active_connections.get(symbol)
+        if not clients:
+            return
+
+        key = f"market_data:{symbol}"
+        for client in list(clients.values()):
+            client.enqueue(key, frame)
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        await websocket.send_text(message)
+
+    async def broadcast_to_symbol(self, message: dict, symbol: str, key: Optional[str] = None):
+        """Serialize once and queue for every subscriber; never waits on a socket"""
+        clients = self.active_connections.get(symbol)
+        if not clients:
+            return
+
+        payload = json.dumps(message)
+        key = key or f"{message.get('type', 'market_data')}:{symbol}"
+        # Snapshot: a failing sender may disconnect while we iterate
+        for client in list(clients.values()):
+            client.enqueue(key, payload)
+
+    def stats(self) -> Dict[str, Any]:
+        clients = list(self.clients.values())
+        return {
+            "connections": len(clients),
+            "symbols": len(self.active_connections),
+            "subscriptions": sum(len(c.symbols) for c in clients),
+            "messages_conflated": self.messages_conflated + sum(c.conflated for c in clients),
+            "messages_dropped": self.messages_dropped + sum(c.dropped for c in clients),
+        }
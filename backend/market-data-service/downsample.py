@@ -0,0 +1,150 @@
+"""
+Market Data Service Downsampling - Casa de Valores Information System
+Streaming OHLC bucket merge and LTTB reduction of historical rows for chart queries
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+def _bucket_width(start: datetime, end: datetime, buckets: int) -> np.timedelta64:
+    span = np.datetime64(end, "us") - np.datetime64(start, "us")
+    return max(span // max(buckets, 1) + np.timedelta64(1, "us"), np.timedelta64(1, "us"))
+
+def _timestamps(rows: List[Dict[str, Any]]) -> np.ndarray:
+    return np.array([row["timestamp"] for row in rows], dtype="datetime64[us]")
+
+class OhlcDownsampler:
+    """Merges time-sorted OHLCV rows into at most `max_points` equal-width time buckets
+
+    Rows are fed in batches; only the bucket still open at the end of a
+    batch is held back, so memory is bounded by the rows of one bucket. That
+    is range / max_points of data, which for a long range with few points can
+    still be many rows.
+    """
+
+    def __init__(self, start: datetime, end: datetime, max_points: int):
+        self.start = np.datetime64(start, "us")
+        self.width = _bucket_width(start, end, max_points)
+        self._pending: List[Dict[str, Any]] = []
+
+    def _merge(self, rows: List[Dict[str, Any]], starts: np.ndarray) -> List[Dict[str, Any]]:
+        high = np.maximum.reduceat(np.array([row["high"] for row in rows], dtype=float), starts)
+        low = np.minimum.reduceat(np.array([row["low"] for row in rows], dtype=float), starts)
+        volume = np.add.reduceat(np.array([row["volume"] for row in rows], dtype=np.int64), starts)
+        adjusted_volume = np.add.reduceat(np.array([row["adjusted_volume"] for row in rows], dtype=np.int64), starts)
+        ends = np.append(starts[1:], len(rows)) - 1
+        merged = []
+        for first, last, bucket_high, bucket_low, bucket_volume, bucket_adjusted_volume in zip(
+            starts.tolist(), ends.tolist(), high.tolist(), low.tolist(), volume.tolist(), adjusted_volume.tolist()
+        ):
+            merged.append({
+                **rows[first],
+                "high": bucket_high,
+                "low": bucket_low,
+                "close": rows[last]["close"],
+                "volume": bucket_volume,
+                "adjusted_close": rows[last]["adjusted_close"],
+                "adjusted_volume": bucket_adjusted_volume,
+            })
+        return merged
+
+    def add(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Feed the next batch; returns the buckets it completed"""
+        if not rows:
+            return []
+        rows = self._pending + rows
+        buckets = (_timestamps(rows) - self.start) // self.width
+        starts = np.flatnonzero(np.diff(buckets)) + 1
+        if not len(starts):
+            self._pending = rows
+            return []
+        self._pending = rows[starts[-1]:]
+        return self._merge(rows[:starts[-1]], np.concatenate(([0], starts[:-1])))
+
+    def finish(self) -> List[Dict[str, Any]]:
+        rows, self._pending = self._pending, []
+        return self._merge(rows, np.array([0])) if rows else []
+
+class LttbDownsampler:
+    """Largest-Triangle-Three-Buckets over time-sorted rows, for line charts
+
+    The first and last rows are always kept and the rest are split into
+    `max_points - 2` equal-width time buckets. From each bucket LTTB keeps
+    the row forming the largest triangle with the previously kept row and
+    the average of the next non-empty bucket, so a bucket is decided as soon
+    as the one after it is complete. Points are (timestamp, adjusted_close),
+    the series that stays continuous across splits.
+    """
+
+    def __init__(self, start: datetime, end: datetime, max_points: int):
+        if max_points < 3:
+            raise ValueError("LTTB needs at least 3 points")
+        self.start = np.datetime64(start, "us")
+        self.width = _bucket_width(start, end, max_points - 2)
+        self._anchor = None  # (t, y) of the last kept row
+        self._buckets: List[List[Dict[str, Any]]] = []  # complete, undecided buckets
+        self._current: List[Dict[str, Any]] = []
+        self._current_bucket = None
+
+    @staticmethod
+    def _points(rows: List[Dict[str, Any]]):
+        t = (_timestamps(rows) - np.datetime64(0, "us")).astype(np.float64)
+        y = np.array([row["adjusted_close"] for row in rows], dtype=float)
+        return t, y
+
+    def _select(self, rows: List[Dict[str, Any]], next_rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        t, y = self._points(rows)
+        next_t, next_y = self._points(next_rows)
+        anchor_t, anchor_y = self._anchor
+        # Twice the triangle areas; the constant factor doesn't change the argmax
+        areas = np.abs((anchor_t - next_t.mean()) * (y - anchor_y) - (anchor_t - t) * (next_y.mean() - anchor_y))
+        chosen = int(np.argmax(areas))
+        self._anchor = (t[chosen], y[chosen])
+        return rows[chosen]
+
+    def _keep_first(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        t, y = self._points([row])
+        self._anchor = (t[0], y[0])
+        return row
+
+    def add(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Feed the next batch; returns the rows it let the downsampler decide"""
+        kept = []
+        if rows and self._anchor is None:
+            kept.append(self._keep_first(rows[0]))
+            rows = rows[1:]
+        if not rows:
+            return kept
+
+        buckets = ((_timestamps(rows) - self.start) // self.width).tolist()
+        for row, bucket in zip(rows, buckets):
+            if bucket != self._current_bucket and self._current:
+                self._buckets.append(self._current)
+                self._current = []
+            self._current_bucket = bucket
+            self._current.append(row)
+
+        # A bucket is decided once the bucket after it is complete
+        while len(self._buckets) >= 2:
+            kept.append(self._select(self._buckets[0], self._buckets[1]))
+            self._buckets.pop(0)
+        return kept
+
+    def finish(self) -> List[Dict[str, Any]]:
+        buckets = self._buckets + ([self._current] if self._current else [])
+        self._buckets, self._current, self._current_bucket = [], [], None
+        if not buckets:
+            return []
+        last = buckets[-1].pop()
+        if not buckets[-1]:
+            buckets.pop()
+        kept = []
+        for position, rows in enumerate(buckets):
+            next_rows = buckets[position + 1] if position + 1 < len(buckets) else [last]
+            kept.append(self._select(rows, next_rows))
+        kept.append(last)
+        return kept
+
+DOWNSAMPLERS = {"ohlc": OhlcDownsampler, "lttb": LttbDownsampler}
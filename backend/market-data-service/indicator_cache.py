@@ -0,0 +1,236 @@
+"""
+Market Data Service Indicator Cache - Casa de Valores Information System
+Incremental indicator series cached in process and in Redis, extended only by newly closed bars
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from quote_cache import QuoteCache
+
+# The calculators reproduce calculate_sma/ema/rsi/macd exactly, one price at a time,
+# and keep only JSON-serializable state so a series can resume in another replica
+
+class _Sma:
+    def __init__(self, period: int):
+        self.period = period
+        self.window: List[float] = []
+
+    def push(self, price: float) -> Optional[float]:
+        self.window.append(price)
+        if len(self.window) > self.period:
+            self.window.pop(0)
+        return sum(self.window) / self.period if len(self.window) == self.period else None
+
+class _Ema:
+    def __init__(self, period: int):
+        self.period = period
+        self.seed: List[float] = []
+        self.value: Optional[float] = None
+
+    def push(self, price: float) -> Optional[float]:
+        if self.value is None:
+            self.seed.append(price)
+            if len(self.seed) < self.period:
+                return None
+            self.value, self.seed = sum(self.seed) / self.period, []
+            return self.value
+        multiplier = 2 / (self.period + 1)
+        self.value = (price * multiplier) + (self.value * (1 - multiplier))
+        return self.value
+
+class _Rsi:
+    def __init__(self, period: int):
+        self.period = period
+        self.last: Optional[float] = None
+        self.gains: List[float] = []
+        self.losses: List[float] = []
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+
+    def push(self, price: float) -> Optional[float]:
+        if self.last is None:
+            self.last = price
+            return None
+        delta, self.last = price - self.last, price
+        gain = delta if delta > 0 else 0
+        loss = -delta if delta < 0 else 0
+        if self.avg_gain is None:
+            self.gains.append(gain)
+            self.losses.append(loss)
+            if len(self.gains) == self.period:
+                self.avg_gain = sum(self.gains) / self.period
+                self.avg_loss = sum(self.losses) / self.period
+                self.gains, self.losses = [], []
+            return None
+        self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+        self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        if self.avg_loss == 0:
+            return 100
+        return 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+
+class _Macd:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = _Ema(fast)
+        self.slow = _Ema(slow)
+        self.signal = _Ema(signal)
+
+    def push(self, price: float) -> Optional[tuple]:
+        fast, slow = self.fast.push(price), self.slow.push(price)
+        if slow is None:
+            return None
+        macd = fast - slow
+        signal = self.signal.push(macd)
+        return None if signal is None else (macd, signal, macd - signal)
+
+def _calculator(indicator: str, period: int):
+    if indicator == "sma":
+        return _Sma(period or 20)
+    if indicator == "ema":
+        return _Ema(period or 20)
+    if indicator == "rsi":
+        return _Rsi(period or 14)
+    if indicator == "macd":
+        return _Macd()
+    return None
+
+def _state(calculator) -> Dict[str, Any]:
+    return {
+        name: _state(value) if hasattr(value, "push") else value
+        for name, value in vars(calculator).items()
+    }
+
+def _restore(calculator, state: Dict[str, Any]):
+    for name, value in state.items():
+        attribute = getattr(calculator, name)
+        if hasattr(attribute, "push"):
+            _restore(attribute, value)
+        else:
+            setattr(calculator, name, value)
+    return calculator
+
+class IndicatorSeries:
+    """Indicator values over a price series plus the calculator state to extend it
+
+    Series are end-aligned like the batch calculators: each indicator list
+    ends at the last bar and starts once the indicator has enough history.
+    """
+
+    def __init__(self, symbol: str, indicators: List[str], period: int, version: int):
+        self.symbol = symbol
+        self.period = period
+        self.version = version
+        self.computed_at = time.time()
+        self.timestamps: List[str] = []
+        self._calculators = {}
+        self.values: Dict[str, Any] = {}
+        for indicator in indicators:
+            calculator = _calculator(indicator, period)
+            if calculator is not None:
+                self._calculators[indicator] = calculator
+                self.values[indicator] = {"macd": [], "signal": [], "histogram": []} if indicator == "macd" else []
+
+    @property
+    def last_timestamp(self) -> Optional[str]:
+        return self.timestamps[-1] if self.timestamps else None
+
+    def extend(self, prices: List[float], timestamps: List[str]) -> int:
+        """Append bars closed after the last one seen; returns how many were new"""
+        if self.timestamps:
+            # Another request may have extended the series while this one was reading
+            last = np.datetime64(self.timestamps[-1], "us")
+            fresh = [i for i, timestamp in enumerate(timestamps) if np.datetime64(timestamp, "us") > last]
+            prices = [prices[i] for i in fresh]
+            timestamps = [timestamps[i] for i in fresh]
+
+        for indicator, calculator in self._calculators.items():
+            series = self.values[indicator]
+            for price in prices:
+                value = calculator.push(price)
+                if value is None:
+                    continue
+                if indicator == "macd":
+                    series["macd"].append(value[0])
+                    series["signal"].append(value[1])
+                    series["histogram"].append(value[2])
+                else:
+                    series.append(value)
+        self.timestamps.extend(timestamps)
+        return len(timestamps)
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "period": self.period,
+            "version": self.version,
+            "computed_at": self.computed_at,
+            "timestamps": self.timestamps,
+            "values": self.values,
+            "state": {indicator: _state(calculator) for indicator, calculator in self._calculators.items()},
+        }
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "IndicatorSeries":
+        series = cls(document["symbol"], list(document["values"]), document["period"], document["version"])
+        series.computed_at = document["computed_at"]
+        series.timestamps = document["timestamps"]
+        series.values = document["values"]
+        for indicator, state in document["state"].items():
+            _restore(series._calculators[indicator], state)
+        return series
+
+class IndicatorCache:
+    """Two-tier cache of IndicatorSeries: an in-process LRU in front of Redis
+
+    Entries are keyed by symbol, indicator set and period, and carry the
+    adjustment table version and the last bar timestamp. A version change
+    invalidates an entry; newer bars extend it. Entries are rebuilt from
+    scratch after `ttl` seconds so the rolling window start and the EMA/RSI
+    seeds follow the requested range.
+
+    Redis holds the series as first built. Extensions stay in process, since
+    rewriting the whole series per new bar would cost more than the few bars
+    another replica reads to catch up.
+    """
+
+    def __init__(self, redis_client=None, max_size: int = 1000, ttl: float = 300.0, prefix: str = "indicators"):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._local = QuoteCache(max_size=max_size, ttl=ttl)
+        self.extensions = 0
+
+    def key(self, symbol: str, indicators: List[str], period: int) -> str:
+        return f"{self.prefix}:{symbol}:{','.join(sorted(set(indicators)))}:{period}"
+
+    async def get(self, key: str, version: int) -> Optional[IndicatorSeries]:
+        series = self._local.get(key)
+        if series is None and self.redis_client is not None:
+            cached_data = await self.redis_client.get(key)
+            if cached_data:
+                series = IndicatorSeries.from_document(json.loads(cached_data))
+                self._local.set(key, series)
+        if series is None:
+            return None
+        if series.version != version or time.time() - series.computed_at > self.ttl:
+            return None
+        return series
+
+    def extend(self, series: IndicatorSeries, prices: List[float], timestamps: List[str]) -> int:
+        """Extend a cached series in place; only this replica's copy changes"""
+        added = series.extend(prices, timestamps)
+        if added:
+            self.extensions += 1
+        return added
+
+    async def set(self, key: str, series: IndicatorSeries):
+        self._local.set(key, series)
+        if self.redis_client is not None:
+            remaining = max(1, int(self.ttl - (time.time() - series.computed_at)))
+            await self.redis_client.setex(key, remaining, json.dumps(series.to_document()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._local.stats(), "extensions": self.extensions}
@@ -0,0 +1,235 @@
+"""
+Market Data Service Indices - Casa de Valores Information System
+Price- and cap-weighted market indices maintained incrementally from constituent ticks
+"""
+
+import math
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+WEIGHTINGS = ("price", "cap")
+
+class _IndexState:
+    """Running weighted sum for one index; value = weighted_sum / divisor"""
+
+    __slots__ = (
+        "symbol", "name", "weighting", "constituents", "weights", "prices", "known",
+        "weighted_sum", "divisor", "base_value", "rebase_value", "reference_value", "open_value", "high", "low",
+        "session", "updates",
+    )
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.symbol = definition["symbol"]
+        self.name = definition.get("name", self.symbol)
+        self.weighting = definition.get("weighting", "price")
+        self.constituents: List[str] = list(definition["constituents"])
+        shares = definition.get("shares") or {}
+        # Price-weighted indices weight every constituent equally per unit of price
+        self.weights = [
+            float(shares.get(symbol, 0.0)) if self.weighting == "cap" else 1.0
+            for symbol in self.constituents
+        ]
+        self.prices: List[float] = [math.nan] * len(self.constituents)
+        self.known = 0
+        self.weighted_sum = 0.0
+        self.divisor: Optional[float] = definition.get("divisor")
+        self.base_value = float(definition.get("base_value", 1000.0))
+        # Value to continue from once a redefined index has prices for every constituent
+        self.rebase_value: Optional[float] = None
+        # Change is measured from the previous session's close; open is this session's first value.
+        # Both are persisted with the session they belong to so a restart mid-session keeps them
+        self.reference_value: Optional[float] = definition.get("reference_value")
+        self.open_value: Optional[float] = definition.get("open_value")
+        session = definition.get("session")
+        self.session: Optional[date] = session.date() if isinstance(session, datetime) else None
+        self.high = -math.inf
+        self.low = math.inf
+        self.updates = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.known == len(self.constituents) and self.divisor is not None
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.weighted_sum / self.divisor if self.complete else None
+
+    def resum(self):
+        self.weighted_sum = math.fsum(w * p for w, p in zip(self.weights, self.prices) if not math.isnan(p))
+
+class IndexEngine:
+    """Keeps every index current with O(1) work per constituent tick
+
+    Each tick moves its indices by weight * (price - previous price) instead
+    of re-summing constituents. The sum is recomputed exactly every
+    `resum_interval` updates to keep floating point drift bounded. Divisors
+    missing from a definition are initialized so the first full value equals
+    base_value, and are re-derived on redefinition so the published value
+    stays continuous; both show up in `dirty_divisors` for persistence
+    (None while a redefined index waits for a constituent's first price).
+    A new trading session makes each index's last value the reference for
+    change and resets open, high and low. Reference and open values land in
+    `dirty_sessions` whenever they are set; persisted ones are only trusted
+    for the session they were recorded in.
+    """
+
+    def __init__(self, resum_interval: int = 10000):
+        self.resum_interval = resum_interval
+        self.session: Optional[date] = None
+        self._indices: Dict[str, _IndexState] = {}
+        # constituent symbol -> [(index state, position)]
+        self._members: Dict[str, List[Tuple[_IndexState, int]]] = {}
+        self.dirty_divisors: Dict[str, Optional[float]] = {}
+        self.dirty_sessions: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._indices
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._indices)
+
+    @staticmethod
+    def constituents_of(definitions: Iterable[Dict[str, Any]]) -> List[str]:
+        return sorted({symbol for definition in definitions for symbol in definition.get("constituents") or ()})
+
+    def load(self, definitions: Iterable[Dict[str, Any]], prices: Optional[Dict[str, float]] = None):
+        """Replace the definitions, seeding from the prices already seen and any given latest prices"""
+        previous = self._indices
+        latest: Dict[str, float] = {}
+        for state in previous.values():
+            for symbol, price in zip(state.constituents, state.prices):
+                if not math.isnan(price):
+                    latest[symbol] = price
+        latest.update(prices or {})
+
+        indices: Dict[str, _IndexState] = {}
+        members: Dict[str, List[Tuple[_IndexState, int]]] = {}
+        for definition in definitions:
+            if definition.get("weighting", "price") not in WEIGHTINGS or not definition.get("constituents"):
+                continue
+            state = _IndexState(definition)
+            old = previous.get(state.symbol)
+            if old is not None:
+                state.reference_value, state.open_value, state.session = old.reference_value, old.open_value, old.session
+                state.high, state.low = old.high, old.low
+            elif self.session is not None and state.session != self.session:
+                state.reference_value = state.open_value = None
+            for position, symbol in enumerate(state.constituents):
+                members.setdefault(symbol, []).append((state, position))
+                if symbol in latest:
+                    state.prices[position] = latest[symbol]
+                    state.known += 1
+            state.resum()
+
+            # Changing constituents or weights must not move the index value
+            if old is not None and old.complete:
+                if (old.constituents, old.weights) != (state.constituents, state.weights) or state.divisor is None:
+                    if state.known == len(state.constituents):
+                        state.divisor = state.weighted_sum / old.value
+                    else:
+                        state.divisor, state.rebase_value = None, old.value
+                    self.dirty_divisors[state.symbol] = state.divisor
+            indices[state.symbol] = state
+
+        self._indices = indices
+        self._members = members
+
+    def start_session(self, session: date):
+        """Roll every index into a later trading session, closing the current one at its last value"""
+        if self.session is not None and session <= self.session:
+            return
+        first, self.session = self.session is None, session
+        for state in self._indices.values():
+            if first:
+                # Values persisted during this session survive a restart; older ones can't be trusted
+                if state.session != session:
+                    state.reference_value = state.open_value = None
+                continue
+            value = state.value
+            if value is not None:
+                state.reference_value = value
+            state.open_value = None
+            state.high, state.low = -math.inf, math.inf
+            self._mark_session(state)
+
+    def _mark_session(self, state: _IndexState):
+        state.session = self.session
+        if self.session is not None:
+            self.dirty_sessions[state.symbol] = {
+                "session": datetime.combine(self.session, time.min),
+                "reference_value": state.reference_value,
+                "open_value": state.open_value,
+            }
+
+    def update(self, symbol: str, price: float) -> List[str]:
+        """Apply a constituent tick; returns the index symbols whose value changed"""
+        changed = []
+        for state, position in self._members.get(symbol, ()):
+            previous = state.prices[position]
+            if math.isnan(previous):
+                state.known += 1
+                state.weighted_sum += state.weights[position] * price
+            else:
+                state.weighted_sum += state.weights[position] * (price - previous)
+            state.prices[position] = price
+
+            state.updates += 1
+            if state.updates % self.resum_interval == 0:
+                state.resum()
+
+            if state.divisor is None and state.known == len(state.constituents):
+                state.divisor = state.weighted_sum / (state.rebase_value or state.base_value)
+                self.dirty_divisors[state.symbol] = state.divisor
+
+            value = state.value
+            if value is not None:
+                if state.reference_value is None or state.open_value is None:
+                    if state.reference_value is None:
+                        state.reference_value = value
+                    if state.open_value is None:
+                        state.open_value = value
+                    self._mark_session(state)
+                state.high = max(state.high, value)
+                state.low = min(state.low, value)
+                changed.append(state.symbol)
+        return changed
+
+    def quote(self, index_symbol: str, timestamp: datetime) -> Optional[Dict[str, Any]]:
+        """The index as a market data tick, so it flows through the same cache and fan-out"""
+        state = self._indices.get(index_symbol)
+        if state is None or not state.complete:
+            return None
+        value = state.value
+        change = value - state.reference_value
+        return {
+            "symbol": state.symbol,
+            "price": round(value, 4),
+            "volume": 0,
+            "change": round(change, 4),
+            "change_percent": round(change / state.reference_value * 100, 4) if state.reference_value else 0.0,
+            "timestamp": timestamp.isoformat(),
+            "high": round(state.high, 4),
+            "low": round(state.low, 4),
+            "open": round(state.open_value, 4),
+        }
+
+    def snapshot(self, index_symbol: str, timestamp: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """The index in MarketIndex shape"""
+        state = self._indices.get(index_symbol)
+        if state is None:
+            return None
+        value = state.value
+        change = value - state.reference_value if value is not None and state.reference_value else 0.0
+        return {
+            "symbol": state.symbol,
+            "name": state.name,
+            "value": value,
+            "change": change,
+            "change_percent": change / state.reference_value * 100 if state.reference_value else 0.0,
+            "constituents": state.constituents,
+            "timestamp": timestamp or datetime.utcnow(),
+        }
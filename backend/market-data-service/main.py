@@ -3,27 +3,55 @@ Market Data Service - Casa de Valores Information System
 Handles real-time market data, historical data, and technical indicators
 """
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-import redis
+from fastapi.responses import StreamingResponse
+import redis.asyncio
 import json
+import csv
+import io
+import zlib
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
 import os
+import socket
+from urllib.parse import urlencode
 from contextlib import asynccontextmanager
 import numpy as np
 import pandas as pd
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
 import websockets
 import aiohttp
 
 from models import MarketData, HistoricalData, TechnicalIndicator, MarketAlert
+from tick_store import TickStore
+from quote_cache import QuoteCache
+from upstream import UpstreamClient
+from connection_manager import ConnectionManager
+from alert_engine import AlertEngine
+from scanner import MarketScanner
+from volume_analysis import VolumeBaselines
+from options import black_scholes, implied_volatility
+from sharding import ShardCoordinator
+from indices import IndexEngine
+from market_calendar import MarketCalendar, CLOSED
+from adjustments import AdjustmentTable, action_factor
+from downsample import DOWNSAMPLERS
+from indicator_cache import IndicatorCache, IndicatorSeries
+from replay import ReplaySession, historical_source, file_source, resolve_replay_path
+from quote_ring import QuoteRingWriter
+from validation import TickValidator
 from schemas import (
-    MarketDataResponse, HistoricalDataRequest, HistoricalDataResponse,
+    MarketDataResponse, HistoricalDataRequest, HistoricalDataResponse, HistoricalDataExportRequest, ExportFormat,
     TechnicalIndicatorRequest, TechnicalIndicatorResponse, MarketAlertRequest,
-    MarketAlertResponse, SubscriptionRequest
+    MarketAlertResponse, SubscriptionRequest, SubscriptionAction, WebSocketSubscriptionMessage,
+    MarketScannerRequest, MarketScannerResponse, VolumeAnalysisResponse,
+    OptionChainRequest, OptionChainResponse, ReplayRequest, ReplayStatusResponse, ReplaySourceType,
+    CorporateActionRequest, CorporateActionResponse, MarketIndexRequest, MarketIndexResponse,
+    MarketCalendarResponse, MarketStatusResponse, WatchlistRequest, WatchlistQuotesResponse
 )
 
 # Configure logging
@@ -32,38 +60,175 @@ logger = logging.getLogger(__name__)
 
 # Configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/3")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017/casa_valores_docs")
+PORTFOLIO_SERVICE_URL = os.getenv("PORTFOLIO_SERVICE_URL", "http://portfolio-service:8000")
+WATCHLIST_CACHE_TTL = float(os.getenv("WATCHLIST_CACHE_TTL", "30"))
 MARKET_DATA_API_KEY = os.getenv("MARKET_DATA_API_KEY", "demo-key")
 MARKET_DATA_BASE_URL = os.getenv("MARKET_DATA_BASE_URL", "https://api.example.com/v1")
+TICK_STORE_PATH = os.getenv("TICK_STORE_PATH", "data/ticks")
+# Silence in the tick store longer than this (seconds) is filled from historical_data
+TICK_GAP_THRESHOLD = float(os.getenv("TICK_GAP_THRESHOLD", "5"))
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "5"))
+QUOTE_CACHE_MAX_SIZE = int(os.getenv("QUOTE_CACHE_MAX_SIZE", "10000"))
+MARKET_DATA_MAX_CONNECTIONS = int(os.getenv("MARKET_DATA_MAX_CONNECTIONS", "100"))
+MARKET_DATA_MAX_CONNECTIONS_PER_HOST = int(os.getenv("MARKET_DATA_MAX_CONNECTIONS_PER_HOST", "10"))
+MARKET_DATA_TIMEOUT = float(os.getenv("MARKET_DATA_TIMEOUT", "10"))
+WS_MAX_PENDING_MESSAGES = int(os.getenv("WS_MAX_PENDING_MESSAGES", "1000"))
+MAX_SYMBOLS_PER_SUBSCRIPTION = int(os.getenv("MAX_SYMBOLS_PER_SUBSCRIPTION", "50"))
+ALERT_POLL_INTERVAL = float(os.getenv("ALERT_POLL_INTERVAL", "1"))
+ALERT_RESYNC_INTERVAL = int(os.getenv("ALERT_RESYNC_INTERVAL", "60"))
+UNUSUAL_VOLUME_RATIO = float(os.getenv("UNUSUAL_VOLUME_RATIO", "2.0"))
+VOLUME_BUCKET_MINUTES = int(os.getenv("VOLUME_BUCKET_MINUTES", "5"))
+VOLUME_LOOKBACK_DAYS = int(os.getenv("VOLUME_LOOKBACK_DAYS", "20"))
+VOLUME_BASELINE_PATH = os.getenv("VOLUME_BASELINE_PATH", "data/volume_baselines.npz")
+VOLUME_BASELINE_SAVE_INTERVAL = float(os.getenv("VOLUME_BASELINE_SAVE_INTERVAL", "300"))
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.05"))
+OPTION_CHAIN_CACHE_TTL = float(os.getenv("OPTION_CHAIN_CACHE_TTL", "60"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+MARKET_DATA_SYMBOLS = os.getenv("MARKET_DATA_SYMBOLS", "AAPL,GOOGL,MSFT,TSLA,AMZN").split(",")
+MARKET_DATA_SYMBOLS_FILE = os.getenv("MARKET_DATA_SYMBOLS_FILE", "")
+MARKET_DATA_UPDATE_INTERVAL = float(os.getenv("MARKET_DATA_UPDATE_INTERVAL", "1"))
+SHARDING_ENABLED = os.getenv("SHARDING_ENABLED", "false").lower() == "true"
+REPLICA_ID = os.getenv("REPLICA_ID", f"{socket.gethostname()}-{os.getpid()}")
+SHARD_LEASE_TTL = float(os.getenv("SHARD_LEASE_TTL", "10"))
+MARKET_DATA_CHANNEL = "market_data:ticks"
+REPLAY_DATA_PATH = os.getenv("REPLAY_DATA_PATH", "data/replay")
+REPLAY_LOCK_KEY = "market_data:replay"
+REPLAY_LOCK_TTL = float(os.getenv("REPLAY_LOCK_TTL", "10"))
+ADJUSTMENT_CACHE_TTL = float(os.getenv("ADJUSTMENT_CACHE_TTL", "300"))
+INDICATOR_CACHE_TTL = float(os.getenv("INDICATOR_CACHE_TTL", "300"))
+INDEX_REFRESH_INTERVAL = float(os.getenv("INDEX_REFRESH_INTERVAL", "60"))
+MARKET_CALENDAR = os.getenv("MARKET_CALENDAR", "NYSE")
+MARKET_HOURS_ONLY = os.getenv("MARKET_HOURS_ONLY", "true").lower() == "true"
+# One writer per path: replicas sharing a host each need their own QUOTE_RING_PATH
+QUOTE_RING_ENABLED = os.getenv("QUOTE_RING_ENABLED", "false").lower() == "true"
+QUOTE_RING_PATH = os.getenv("QUOTE_RING_PATH", "/dev/shm/casa_quotes")
+QUOTE_RING_SLOTS = int(os.getenv("QUOTE_RING_SLOTS", "8192"))
+QUOTE_RING_CAPACITY = int(os.getenv("QUOTE_RING_CAPACITY", "65536"))
+TICK_VALIDATION_ENABLED = os.getenv("TICK_VALIDATION_ENABLED", "true").lower() == "true"
+TICK_MAX_AGE = float(os.getenv("TICK_MAX_AGE", "5"))
+TICK_SPIKE_THRESHOLD = float(os.getenv("TICK_SPIKE_THRESHOLD", "0.2"))
+TICK_MEDIAN_WINDOW = int(os.getenv("TICK_MEDIAN_WINDOW", "21"))
 
 # Global variables
+redis_pool = None
 redis_client = None
 mongodb_client = None
 mongodb_db = None
+portfolio_session: Optional[aiohttp.ClientSession] = None
+shard_coordinator: Optional[ShardCoordinator] = None
+replay_session: Optional[ReplaySession] = None
+# (replay id, scratch copy of the alert index) for the replay this replica last applied
+replay_alerts: Optional[Tuple[str, AlertEngine]] = None
+quote_ring: Optional[QuoteRingWriter] = None
 active_connections: Dict[str, List[WebSocket]] = {}
-market_data_cache: Dict[str, Dict] = {}
+market_data_cache = QuoteCache(max_size=QUOTE_CACHE_MAX_SIZE, ttl=QUOTE_CACHE_TTL)
+tick_store = TickStore(TICK_STORE_PATH)
+alert_engine = AlertEngine()
+triggered_alerts: asyncio.Queue = asyncio.Queue()
+index_engine = IndexEngine()
+def new_tick_validator() -> TickValidator:
+    return TickValidator(max_age=TICK_MAX_AGE, spike_threshold=TICK_SPIKE_THRESHOLD, window=TICK_MEDIAN_WINDOW)
+
+tick_validator = new_tick_validator()
+market_calendar = MarketCalendar()
+market_scanner = MarketScanner(unusual_volume_ratio=UNUSUAL_VOLUME_RATIO)
+volume_baselines = VolumeBaselines(
+    bucket_minutes=VOLUME_BUCKET_MINUTES,
+    lookback_days=VOLUME_LOOKBACK_DAYS,
+    unusual_ratio=UNUSUAL_VOLUME_RATIO,
+    timezone=market_calendar.timezone(MARKET_CALENDAR)
+)
+# Option chain contracts per underlying, so per-tick repricing is pure array math
+option_chain_cache = QuoteCache(max_size=1000, ttl=OPTION_CHAIN_CACHE_TTL)
+# Precomputed split/dividend factor tables; the TTL bounds staleness after another replica records an action
+adjustment_cache = QuoteCache(max_size=QUOTE_CACHE_MAX_SIZE, ttl=ADJUSTMENT_CACHE_TTL)
+# Watchlist symbols resolved from portfolio-service, keyed by user and watchlist
+watchlist_cache = QuoteCache(max_size=QUOTE_CACHE_MAX_SIZE, ttl=WATCHLIST_CACHE_TTL)
+# Indicator series extended bar by bar; shared through Redis once the client is connected
+indicator_cache = IndicatorCache(max_size=1000, ttl=INDICATOR_CACHE_TTL)
+upstream_client = UpstreamClient(
+    MARKET_DATA_BASE_URL,
+    MARKET_DATA_API_KEY,
+    max_connections=MARKET_DATA_MAX_CONNECTIONS,
+    max_connections_per_host=MARKET_DATA_MAX_CONNECTIONS_PER_HOST,
+    timeout=MARKET_DATA_TIMEOUT
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    global redis_client, mongodb_client, mongodb_db
+    global redis_pool, redis_client, mongodb_client, mongodb_db, shard_coordinator, quote_ring, portfolio_session
     
     # Startup
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+    # One bounded pool shared by every coroutine; callers wait for a free connection instead of opening more
+    redis_pool = redis.asyncio.BlockingConnectionPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        decode_responses=True
+    )
+    redis_client = redis.asyncio.Redis(connection_pool=redis_pool)
+    indicator_cache.redis_client = redis_client
     mongodb_client = AsyncIOMotorClient(MONGODB_URL)
     mongodb_db = mongodb_client.casa_valores_docs
+    portfolio_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=MARKET_DATA_TIMEOUT))
+    
+    volume_baselines.load(VOLUME_BASELINE_PATH)
+    
+    # Ad-hoc closures and half days recorded as MarketHoliday documents
+    market_calendar.load_overrides(await mongodb_db.market_holidays.find({}).to_list(length=None))
+    
+    await load_market_indices()
+    
+    # Build the in-memory alert index once; ticks are evaluated against it. The change
+    # stream starts from the cluster time before the load so no write falls in between.
+    alerts_watch_from = await current_cluster_time()
+    alerts_loaded_until = await load_active_alerts()
+    
+    symbols = load_symbol_universe()
+    if QUOTE_RING_ENABLED:
+        # Latest quotes for co-located readers; the universe and indices get the first slots
+        quote_ring = QuoteRingWriter(
+            QUOTE_RING_PATH,
+            slot_count=QUOTE_RING_SLOTS,
+            ring_capacity=QUOTE_RING_CAPACITY,
+            symbols=symbols + index_engine.symbols
+        )
+    if SHARDING_ENABLED:
+        # Each replica produces only its share; every replica applies all ticks from the channel
+        shard_coordinator = ShardCoordinator(redis_client, REPLICA_ID, symbols, lease_ttl=SHARD_LEASE_TTL)
+        asyncio.create_task(shard_heartbeat())
+        asyncio.create_task(market_data_subscriber())
     
     # Start background tasks
-    asyncio.create_task(market_data_updater())
+    asyncio.create_task(market_data_updater(symbols))
     asyncio.create_task(process_market_alerts())
+    asyncio.create_task(refresh_market_indices())
+    asyncio.create_task(watch_market_alerts(alerts_loaded_until, alerts_watch_from))
     
     logger.info("Market Data Service started successfully")
     
     yield
     
     # Shutdown
+    if replay_session:
+        await replay_session.stop()
+    if shard_coordinator:
+        await shard_coordinator.release()
+    tick_store.close()
+    if quote_ring:
+        quote_ring.close()
+    volume_baselines.save(VOLUME_BASELINE_PATH)
+    await upstream_client.close()
+    if portfolio_session:
+        await portfolio_session.close()
     if redis_client:
-        redis_client.close()
+        await redis_client.aclose()
+    if redis_pool:
+        await redis_pool.disconnect()
     if mongodb_client:
         mongodb_client.close()
     logger.info("Market Data Service shutdown complete")
@@ -86,37 +251,10 @@ app.add_middleware(
 )
 
 # Connection manager for WebSocket connections
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-    
-    async def connect(self, websocket: WebSocket, symbol: str):
-        await websocket.accept()
-        if symbol not in self.active_connections:
-            self.active_connections[symbol] = []
-        self.active_connections[symbol].append(websocket)
-        logger.info(f"Client connected to {symbol} feed")
-    
-    def disconnect(self, websocket: WebSocket, symbol: str):
-        if symbol in self.active_connections:
-            self.active_connections[symbol].remove(websocket)
-            if not self.active_connections[symbol]:
-                del self.active_connections[symbol]
-        logger.info(f"Client disconnected from {symbol} feed")
-    
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
-    
-    async def broadcast_to_symbol(self, message: dict, symbol: str):
-        if symbol in self.active_connections:
-            for connection in self.active_connections[symbol]:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except:
-                    # Remove dead connections
-                    self.active_connections[symbol].remove(connection)
-
-manager = ConnectionManager()
+manager = ConnectionManager(
+    max_pending=WS_MAX_PENDING_MESSAGES,
+    max_symbols_per_connection=MAX_SYMBOLS_PER_SUBSCRIPTION
+)
 
 # Utility functions
 def calculate_sma(prices: List[float], period: int) -> List[float]:
@@ -201,36 +339,65 @@ def calculate_macd(prices: List[float], fast: int = 12, slow: int = 26, signal:
 async def fetch_external_market_data(symbol: str) -> Optional[Dict]:
     """Fetch market data from external API"""
     try:
-        async with aiohttp.ClientSession() as session:
-            url = f"{MARKET_DATA_BASE_URL}/quote/{symbol}"
-            headers = {"Authorization": f"Bearer {MARKET_DATA_API_KEY}"}
-            
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return {
-                        "symbol": symbol,
-                        "price": data.get("price", 0.0),
-                        "volume": data.get("volume", 0),
-                        "change": data.get("change", 0.0),
-                        "change_percent": data.get("change_percent", 0.0),
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
+        # Concurrent misses for the same symbol share one pooled upstream request
+        return await upstream_client.fetch_quote(symbol)
     except Exception as e:
         logger.error(f"Error fetching market data for {symbol}: {e}")
     
     return None
 
-async def market_data_updater():
+def load_symbol_universe() -> List[str]:
+    """Instruments to produce ticks for, from MARKET_DATA_SYMBOLS_FILE (one per line) or MARKET_DATA_SYMBOLS"""
+    symbols = MARKET_DATA_SYMBOLS
+    if MARKET_DATA_SYMBOLS_FILE:
+        with open(MARKET_DATA_SYMBOLS_FILE) as f:
+            symbols = f.read().split()
+    return sorted({symbol.strip().upper() for symbol in symbols if symbol.strip()})
+
+async def shard_heartbeat():
+    """Background task keeping this replica's membership and symbol leases alive"""
+    while True:
+        try:
+            await shard_coordinator.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing shard leases: {e}")
+        await asyncio.sleep(SHARD_LEASE_TTL / 3)
+
+async def market_data_updater(symbols: List[str]):
     """Background task to update market data"""
-    symbols = ["AAPL", "GOOGL", "MSFT", "TSLA", "AMZN"]  # Example symbols
+    next_baseline_save = asyncio.get_running_loop().time() + VOLUME_BASELINE_SAVE_INTERVAL
     
     while True:
         try:
-            for symbol in symbols:
-                # Simulate market data (replace with real API calls)
+            # Checkpoint volume baselines so a crash loses minutes of history, not weeks
+            if asyncio.get_running_loop().time() >= next_baseline_save:
+                next_baseline_save = asyncio.get_running_loop().time() + VOLUME_BASELINE_SAVE_INTERVAL
+                await asyncio.get_running_loop().run_in_executor(
+                    None, VolumeBaselines.write, VOLUME_BASELINE_PATH, volume_baselines.snapshot()
+                )
+            
+            # A replay on any replica replaces the live source cluster-wide
+            if await replay_active():
+                await asyncio.sleep(1)
+                continue
+            
+            # No ingestion outside pre-market, regular and after-hours sessions
+            if MARKET_HOURS_ONLY and market_calendar.session(MARKET_CALENDAR) == CLOSED:
+                await asyncio.sleep(1)
+                continue
+            
+            cycle_started = asyncio.get_running_loop().time()
+            updates = []
+            tick_time = datetime.utcnow()
+            
+            # With sharding on, produce only symbols whose lease this replica holds
+            owned = shard_coordinator.owned if shard_coordinator else symbols
+            
+            for symbol in owned:
+                # Simulate market data (replace with real API calls); a random walk from the last quote
                 import random
-                price = random.uniform(100, 500)
+                previous = market_data_cache.peek(symbol)
+                price = previous["price"] * (1 + random.gauss(0, 0.002)) if previous else random.uniform(100, 500)
                 volume = random.randint(1000, 100000)
                 change = random.uniform(-5, 5)
                 change_percent = (change / price) * 100
@@ -241,118 +408,509 @@ async def market_data_updater():
                     "volume": volume,
                     "change": round(change, 2),
                     "change_percent": round(change_percent, 2),
-                    "timestamp": datetime.utcnow().isoformat(),
+                    "timestamp": tick_time.isoformat(),
                     "bid": round(price - 0.01, 2),
                     "ask": round(price + 0.01, 2),
                     "high": round(price * 1.02, 2),
                     "low": round(price * 0.98, 2),
                     "open": round(price * 0.99, 2)
                 }
-                
-                # Cache in Redis
-                redis_client.setex(f"market_data:{symbol}", 60, json.dumps(market_data))
-                
-                # Store in MongoDB for historical data
-                await mongodb_db.historical_data.insert_one({
-                    **market_data,
-                    "timestamp": datetime.utcnow()
-                })
-                
-                # Broadcast to WebSocket clients
-                await manager.broadcast_to_symbol(market_data, symbol)
-                
-                # Update global cache
-                market_data_cache[symbol] = market_data
+                updates.append(market_data)
+            
+            # Drop bad ticks before they reach Redis, Mongo, alerts and subscribers
+            updates = validate_ticks(tick_validator, updates, tick_time)
+            
+            if updates:
+                await persist_market_data(updates, tick_time)
+                if shard_coordinator:
+                    await redis_client.publish(MARKET_DATA_CHANNEL, json.dumps(updates))
+                else:
+                    await apply_market_data(updates, tick_time)
             
-            await asyncio.sleep(1)  # Update every second
+            # Hold the configured tick rate regardless of how long the cycle took
+            elapsed = asyncio.get_running_loop().time() - cycle_started
+            await asyncio.sleep(max(0.0, MARKET_DATA_UPDATE_INTERVAL - elapsed))
             
         except Exception as e:
             logger.error(f"Error in market data updater: {e}")
             await asyncio.sleep(5)
 
+def validate_ticks(validator: TickValidator, updates: List[Dict[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+    """Accepted ticks of a batch, logging what was rejected"""
+    if not updates or not TICK_VALIDATION_ENABLED:
+        return updates
+    updates, rejected = validator.validate(updates, now)
+    if rejected:
+        logger.warning(
+            f"Rejected {len(rejected)} ticks: "
+            + ", ".join(f"{tick.get('symbol')} ({reason})" for tick, reason in rejected[:10])
+        )
+    return updates
+
+async def persist_market_data(updates: List[Dict[str, Any]], tick_time: datetime, record_history: bool = True):
+    """Shared writes, done once by the producing replica"""
+    # Cache in Redis with a single pipelined round trip
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for market_data in updates:
+            pipe.setex(f"market_data:{market_data['symbol']}", 60, json.dumps(market_data))
+        await pipe.execute()
+    
+    if not record_history:
+        return
+    
+    # Store in MongoDB for historical data
+    await mongodb_db.historical_data.insert_many([
+        {**market_data, "timestamp": tick_time}
+        for market_data in updates
+    ])
+
+async def apply_market_data(updates: List[Dict[str, Any]], tick_time: datetime):
+    """Replica-local state: tick store, caches, analytics, alerts and WebSocket fan-out"""
+    changed_indices = set()
+    # Index change and open restart with each trading session (replays of older dates don't roll back)
+    index_engine.start_session(market_calendar.trading_date(MARKET_CALENDAR, tick_time))
+    
+    for market_data in updates:
+        symbol = market_data["symbol"]
+        
+        # Append to the columnar tick store (replayed ticks are already recorded)
+        replay = market_data.get("replay")
+        if not replay:
+            tick_store.append(symbol, tick_time, market_data["price"], market_data["volume"])
+        
+        # Broadcast to WebSocket clients
+        await manager.broadcast_market_data(market_data, symbol)
+        
+        # Update global cache and the scanner's columnar snapshot
+        market_data_cache.set(symbol, market_data)
+        market_scanner.update(market_data)
+        if quote_ring:
+            quote_ring.write(market_data)
+        
+        # Time-of-day volume baselines; replayed history must not train them
+        if not replay:
+            volume_alert = volume_baselines.update(symbol, market_data["volume"], tick_time)
+            volume_ratio = volume_baselines.volume_ratio(symbol)
+            if volume_ratio == volume_ratio:  # NaN until a baseline exists
+                market_scanner.set_volume_ratio(symbol, volume_ratio)
+            if volume_alert:
+                await manager.broadcast_to_symbol(
+                    {**volume_alert, "type": "unusual_volume", "timestamp": tick_time.isoformat()},
+                    symbol
+                )
+        
+        # Evaluate only the alerts this price crosses
+        await evaluate_alerts(symbol, market_data["price"], tick_time, market_data.get("replay_id") if replay else None)
+        
+        # Move every index containing the symbol by this tick's weighted price change
+        changed_indices.update(index_engine.update(symbol, market_data["price"]))
+    
+    await tick_store.flush_async()
+    
+    if changed_indices:
+        await publish_index_quotes(changed_indices, tick_time, updates[0].get("replay_id"))
+
+def alert_message(alert: Dict[str, Any], current_price: float, triggered_at: datetime) -> Dict[str, Any]:
+    symbol = alert["symbol"]
+    return {
+        "type": "alert",
+        "alert_id": str(alert["_id"]),
+        "symbol": symbol,
+        "message": f"{symbol} price {alert['condition']} {alert['target_value']}",
+        "current_price": current_price,
+        "timestamp": triggered_at.isoformat()
+    }
+
+def replay_alert_engine(replay_id: str) -> AlertEngine:
+    """Scratch copy of the active alerts taken when a replay's first tick arrives"""
+    global replay_alerts
+    if replay_alerts is None or replay_alerts[0] != replay_id:
+        replay_alerts = (replay_id, alert_engine.copy())
+    return replay_alerts[1]
+
+async def evaluate_alerts(symbol: str, price: float, tick_time: datetime, replay_id: Optional[str] = None):
+    """Queue the alerts a price crosses for notification and deactivation
+
+    Replayed prices trigger against the replay's copy of the index instead;
+    those alerts are broadcast, marked as replayed, and never written back.
+    """
+    if replay_id is None:
+        for alert in alert_engine.evaluate(symbol, price):
+            triggered_alerts.put_nowait((alert, price))
+        return
+    for alert in replay_alert_engine(replay_id).evaluate(symbol, price):
+        await manager.broadcast_to_symbol(
+            {**alert_message(alert, price, tick_time), "replay": True}, symbol, key=f"alert:{alert['_id']}"
+        )
+
+async def publish_index_quotes(index_symbols, tick_time: datetime, replay_id: Optional[str] = None):
+    """Publish index values once per batch through the same cache, fan-out and alert paths as symbols"""
+    quotes = [index_engine.quote(index_symbol, tick_time) for index_symbol in index_symbols]
+    
+    # Every replica computes the same values; the ring picks one to write each to Redis
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for quote in quotes:
+            if shard_coordinator is None or shard_coordinator.assigned(quote["symbol"]):
+                pipe.setex(f"market_data:{quote['symbol']}", 60, json.dumps(quote))
+        await pipe.execute()
+    
+    for quote in quotes:
+        symbol = quote["symbol"]
+        await manager.broadcast_market_data(quote, symbol)
+        market_data_cache.set(symbol, quote)
+        if quote_ring:
+            quote_ring.write(quote)
+        await evaluate_alerts(symbol, quote["price"], tick_time, replay_id)
+    
+    if index_engine.dirty_divisors:
+        await save_index_divisors()
+    if index_engine.dirty_sessions:
+        await save_index_sessions()
+
+async def load_market_indices():
+    """(Re)load index definitions; divisors stay continuous across constituent changes"""
+    definitions = await mongodb_db.market_indices.find({}).to_list(length=None)
+    
+    # Seed constituents from the shared quote cache so new members don't wait for their next tick
+    constituents = IndexEngine.constituents_of(definitions)
+    cached_values = await redis_client.mget([f"market_data:{symbol}" for symbol in constituents]) if constituents else []
+    prices = {
+        symbol: json.loads(cached_data)["price"]
+        for symbol, cached_data in zip(constituents, cached_values) if cached_data
+    }
+    index_engine.load(definitions, prices)
+    if index_engine.dirty_divisors:
+        await save_index_divisors()
+
+async def save_index_divisors():
+    dirty, index_engine.dirty_divisors = index_engine.dirty_divisors, {}
+    for index_symbol, divisor in dirty.items():
+        await mongodb_db.market_indices.update_one({"symbol": index_symbol}, {"$set": {"divisor": divisor}})
+
+async def save_index_sessions():
+    """Persist each index's session reference and open so a restart doesn't measure change from the restart"""
+    dirty, index_engine.dirty_sessions = index_engine.dirty_sessions, {}
+    for index_symbol, fields in dirty.items():
+        await mongodb_db.market_indices.update_one({"symbol": index_symbol}, {"$set": fields})
+
+async def refresh_market_indices():
+    """Background task picking up index definitions changed by any replica"""
+    while True:
+        await asyncio.sleep(INDEX_REFRESH_INTERVAL)
+        try:
+            await load_market_indices()
+        except Exception as e:
+            logger.error(f"Error refreshing market indices: {e}")
+
+async def replay_active() -> bool:
+    """Whether this or another replica is replaying; live producers stay paused meanwhile"""
+    if replay_session and replay_session.running:
+        return True
+    return bool(await redis_client.exists(REPLAY_LOCK_KEY))
+
+async def hold_replay_lock(session: ReplaySession):
+    """Background task keeping the cluster-wide replay lock alive until the session ends"""
+    try:
+        while session.running:
+            await redis_client.set(REPLAY_LOCK_KEY, REPLICA_ID, px=int(REPLAY_LOCK_TTL * 1000))
+            await asyncio.sleep(min(1.0, REPLAY_LOCK_TTL / 3))
+        await redis_client.delete(REPLAY_LOCK_KEY)
+    except Exception as e:
+        logger.error(f"Error holding replay lock: {e}")
+
+async def publish_replay_batch(tick_time: datetime, updates: List[Dict[str, Any]], validator: TickValidator,
+                               replay_id: str):
+    """Feed a recorded batch through the live Redis, WebSocket and alert paths without re-recording it
+
+    Live producers on every replica are paused by the replay lock, so the
+    shared channel carries only replayed ticks while it runs.
+    """
+    updates = [
+        {**market_data, "timestamp": tick_time.isoformat(), "replay": True, "replay_id": replay_id}
+        for market_data in updates
+    ]
+    # Recorded time is the batch time; the replay's own validator keeps old prices out of the live medians
+    updates = validate_ticks(validator, updates, tick_time)
+    if not updates:
+        return
+    await persist_market_data(updates, tick_time, record_history=False)
+    if shard_coordinator:
+        await redis_client.publish(MARKET_DATA_CHANNEL, json.dumps(updates))
+    else:
+        await apply_market_data(updates, tick_time)
+
+async def market_data_subscriber():
+    """Background task applying tick batches published by every replica"""
+    while True:
+        try:
+            async with redis_client.pubsub() as pubsub:
+                await pubsub.subscribe(MARKET_DATA_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    updates = json.loads(message["data"])
+                    await apply_market_data(updates, datetime.fromisoformat(updates[0]["timestamp"]))
+        except Exception as e:
+            logger.error(f"Error in market data subscriber: {e}")
+            await asyncio.sleep(5)
+
+async def load_active_alerts() -> Optional[datetime]:
+    """Rebuild the alert index from MongoDB; returns the newest created_at seen"""
+    cursor = mongodb_db.market_alerts.find({"is_active": True})
+    alerts = [alert async for alert in cursor]
+    alert_engine.load(alerts)
+    logger.info(f"Loaded {len(alert_engine)} active market alerts")
+    return max((alert["created_at"] for alert in alerts if alert.get("created_at")), default=None)
+
+def apply_alert_change(change: Dict[str, Any]):
+    """Apply one market_alerts change stream event to the alert index"""
+    operation = change["operationType"]
+    if operation in ("insert", "update", "replace"):
+        alert = change.get("fullDocument")
+        alert_id = str(change["documentKey"]["_id"])
+        if operation != "insert":
+            alert_engine.remove(alert_id, retire=False)
+        if alert and alert.get("is_active"):
+            alert_engine.add(alert)
+        elif operation != "insert":
+            alert_engine.remove(alert_id)
+    elif operation == "delete":
+        alert_engine.remove(str(change["documentKey"]["_id"]))
+
+async def current_cluster_time():
+    """Operation time of the deployment, or None where it isn't reported (standalone servers)"""
+    try:
+        return (await mongodb_db.command("ping")).get("operationTime")
+    except Exception as e:
+        logger.error(f"Error reading cluster time: {e}")
+        return None
+
+async def watch_market_alerts(loaded_until: Optional[datetime] = None, start_at=None):
+    """Background task keeping the alert index in sync with writes from any replica"""
+    resume_token = None
+    
+    while True:
+        try:
+            async with mongodb_db.market_alerts.watch(
+                full_document="updateLookup",
+                resume_after=resume_token,
+                start_at_operation_time=None if resume_token else start_at
+            ) as stream:
+                async for change in stream:
+                    apply_alert_change(change)
+                    resume_token = stream.resume_token
+        except (OperationFailure, NotImplementedError) as e:
+            # Standalone servers have no change streams
+            if isinstance(e, OperationFailure) and e.code != 40573:
+                # The resume point may have rolled off the oplog (ChangeStreamHistoryLost), so
+                # resuming again would fail forever; reload the index and watch from now on
+                logger.error(f"Error watching market alerts, reloading: {e}")
+                await asyncio.sleep(5)
+                try:
+                    start_at = await current_cluster_time()
+                    loaded_until = await load_active_alerts() or loaded_until
+                    resume_token = None
+                except Exception as reload_error:
+                    logger.error(f"Error reloading market alerts: {reload_error}")
+                continue
+            logger.info("Change streams unavailable, polling market alerts by created_at")
+            await poll_market_alerts(loaded_until)
+            return
+        except Exception as e:
+            logger.error(f"Error watching market alerts: {e}")
+            await asyncio.sleep(5)
+
+async def poll_market_alerts(last_created_at: Optional[datetime] = None):
+    """Fallback sync: pick up new alerts by created_at, with a periodic full reload for deletions"""
+    last_created_at = last_created_at or datetime.utcnow()
+    next_resync = asyncio.get_running_loop().time() + ALERT_RESYNC_INTERVAL
+    
+    while True:
+        await asyncio.sleep(ALERT_POLL_INTERVAL)
+        try:
+            if asyncio.get_running_loop().time() >= next_resync:
+                last_created_at = await load_active_alerts() or last_created_at
+                next_resync = asyncio.get_running_loop().time() + ALERT_RESYNC_INTERVAL
+                continue
+            
+            # $gte because created_at is stored at millisecond precision; add() skips known ids
+            cursor = mongodb_db.market_alerts.find({
+                "is_active": True,
+                "created_at": {"$gte": last_created_at}
+            }).sort("created_at", 1)
+            async for alert in cursor:
+                alert_engine.add(alert)
+                last_created_at = max(last_created_at, alert["created_at"])
+        except Exception as e:
+            logger.error(f"Error polling market alerts: {e}")
+
 async def process_market_alerts():
-    """Background task to process market alerts"""
+    """Background task to notify and persist alerts triggered by price updates"""
     while True:
         try:
-            # Get all active alerts from MongoDB
-            alerts_cursor = mongodb_db.market_alerts.find({"is_active": True})
-            alerts = await alerts_cursor.to_list(length=None)
+            batch = [await triggered_alerts.get()]
+            while not triggered_alerts.empty():
+                batch.append(triggered_alerts.get_nowait())
             
-            for alert in alerts:
-                symbol = alert["symbol"]
-                condition = alert["condition"]
-                target_value = alert["target_value"]
-                
-                # Get current market data
-                current_data = market_data_cache.get(symbol)
-                if not current_data:
-                    continue
-                
-                current_price = current_data["price"]
-                triggered = False
-                
-                # Check alert conditions
-                if condition == "above" and current_price > target_value:
-                    triggered = True
-                elif condition == "below" and current_price < target_value:
-                    triggered = True
-                elif condition == "equals" and abs(current_price - target_value) < 0.01:
-                    triggered = True
-                
-                if triggered:
-                    # Trigger alert
-                    alert_message = {
-                        "type": "alert",
-                        "alert_id": str(alert["_id"]),
-                        "symbol": symbol,
-                        "message": f"{symbol} price {condition} {target_value}",
-                        "current_price": current_price,
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-                    
-                    # Broadcast alert
-                    await manager.broadcast_to_symbol(alert_message, symbol)
-                    
-                    # Deactivate alert
-                    await mongodb_db.market_alerts.update_one(
-                        {"_id": alert["_id"]},
-                        {"$set": {"is_active": False, "triggered_at": datetime.utcnow()}}
-                    )
+            triggered_at = datetime.utcnow()
+            for alert, current_price in batch:
+                # Broadcast alert (never conflated with other messages)
+                await manager.broadcast_to_symbol(
+                    alert_message(alert, current_price, triggered_at), alert["symbol"], key=f"alert:{alert['_id']}"
+                )
             
-            await asyncio.sleep(1)  # Check every second
+            # Deactivate all triggered alerts in one write; with sharding every replica
+            # evaluates the tick, and only the first write sets triggered_at
+            await mongodb_db.market_alerts.update_many(
+                {"_id": {"$in": [alert["_id"] for alert, _ in batch]}, "is_active": True},
+                {"$set": {"is_active": False, "triggered_at": triggered_at}}
+            )
+            for alert, _ in batch:
+                alert_engine.pending_ids.discard(str(alert["_id"]))
             
         except Exception as e:
             logger.error(f"Error in alert processor: {e}")
             await asyncio.sleep(5)
 
-# WebSocket endpoint for real-time data
+async def send_current_snapshots(client, symbols: List[str]):
+    """Queue the latest cached quote for each newly subscribed symbol"""
+    missing = [symbol for symbol in symbols if not manager.enqueue_latest(client, symbol)]
+    if not missing:
+        return
+    
+    cached_values = await redis_client.mget([f"market_data:{symbol}" for symbol in missing])
+    for current_data in cached_values:
+        if current_data:
+            manager.enqueue_snapshot(client, json.loads(current_data))
+
+async def get_cached_quotes(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Latest quotes from the in-process cache, with one MGET for the rest"""
+    quotes = {}
+    missing = []
+    for symbol in symbols:
+        data = market_data_cache.get(symbol)
+        if data:
+            quotes[symbol] = data
+        else:
+            missing.append(symbol)
+    
+    if missing:
+        cached_values = await redis_client.mget([f"market_data:{symbol}" for symbol in missing])
+        for symbol, cached_data in zip(missing, cached_values):
+            if cached_data:
+                quotes[symbol] = json.loads(cached_data)
+                market_data_cache.set(symbol, quotes[symbol])
+    return quotes
+
+async def resolve_watchlist(watchlist_id: str, user_id: str) -> Dict[str, Any]:
+    """Watchlist name and symbols from portfolio-service, cached briefly per user"""
+    cache_key = f"{user_id}:{watchlist_id}"
+    watchlist = watchlist_cache.get(cache_key)
+    if watchlist:
+        return watchlist
+    
+    try:
+        async with portfolio_session.get(
+            f"{PORTFOLIO_SERVICE_URL}/api/v1/watchlists/{watchlist_id}",
+            headers={"X-User-ID": user_id}
+        ) as response:
+            if response.status == 404:
+                raise HTTPException(status_code=404, detail="Watchlist not found")
+            if response.status != 200:
+                raise HTTPException(status_code=502, detail="Error resolving watchlist")
+            watchlist = await response.json()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Error resolving watchlist {watchlist_id}: {e}")
+        raise HTTPException(status_code=502, detail="Error resolving watchlist")
+    
+    watchlist["symbols"] = [symbol.upper().strip() for symbol in watchlist.get("symbols", [])]
+    watchlist_cache.set(cache_key, watchlist)
+    return watchlist
+
+async def subscribe_client(client, symbols: List[str]):
+    """Subscribe, acknowledge and send snapshots for the newly added symbols"""
+    added = manager.subscribe(client, symbols)
+    # Acknowledge first so binary clients learn symbol ids before any tick
+    client.enqueue("subscriptions", manager.subscription_message(client))
+    await send_current_snapshots(client, added)
+
+# WebSocket endpoints for real-time data
+@app.websocket("/ws/market-data")
+async def multiplexed_websocket_endpoint(websocket: WebSocket):
+    """One connection for many symbols, driven by subscribe/unsubscribe messages
+
+    ?symbols= or ?watchlist_id= subscribe the connection up front. The
+    watchlist quote endpoints hand out ?symbols= URLs; ?watchlist_id= is for
+    server-side clients that send the owner's X-User-ID header.
+    """
+    client = await manager.connect(websocket)
+    try:
+        symbols = [symbol.upper().strip() for symbol in websocket.query_params.get("symbols", "").split(",") if symbol.strip()]
+        watchlist_id = websocket.query_params.get("watchlist_id")
+        if symbols or watchlist_id:
+            try:
+                if watchlist_id:
+                    user_id = websocket.headers.get("x-user-id")
+                    if not user_id:
+                        raise HTTPException(status_code=401, detail="User ID not found in request")
+                    symbols += (await resolve_watchlist(watchlist_id, user_id))["symbols"]
+                await subscribe_client(client, symbols)
+            except HTTPException as e:
+                client.enqueue("error", json.dumps({"type": "error", "detail": e.detail}))
+            except ValueError as e:
+                client.enqueue("error", json.dumps({"type": "error", "detail": str(e)}))
+        
+        while True:
+            raw_message = await websocket.receive_text()
+            try:
+                message = WebSocketSubscriptionMessage(**json.loads(raw_message))
+                if message.action == SubscriptionAction.SUBSCRIBE:
+                    await subscribe_client(client, message.symbols)
+                else:
+                    manager.unsubscribe(client, message.symbols)
+                    client.enqueue("subscriptions", manager.subscription_message(client))
+            except (ValueError, TypeError) as e:
+                client.enqueue("error", json.dumps({"type": "error", "detail": str(e)}))
+    except WebSocketDisconnect:
+        manager.disconnect(client)
+
 @app.websocket("/ws/market-data/{symbol}")
 async def websocket_endpoint(websocket: WebSocket, symbol: str):
-    await manager.connect(websocket, symbol)
+    client = await manager.connect(websocket)
     try:
+        manager.subscribe(client, [symbol])
+        
         # Send current data immediately
-        current_data = redis_client.get(f"market_data:{symbol}")
-        if current_data:
-            await websocket.send_text(current_data)
+        await send_current_snapshots(client, [symbol])
         
         while True:
             # Keep connection alive
             await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(websocket, symbol)
+        manager.disconnect(client)
 
 # REST API endpoints
 @app.get("/api/v1/market-data/{symbol}", response_model=MarketDataResponse)
 async def get_market_data(symbol: str):
     """Get current market data for a symbol"""
-    # Try Redis cache first
-    cached_data = redis_client.get(f"market_data:{symbol}")
+    # Serve from the in-process cache while fresh
+    data = market_data_cache.get(symbol)
+    if data:
+        return data
+    
+    # Then Redis
+    cached_data = await redis_client.get(f"market_data:{symbol}")
     if cached_data:
-        return json.loads(cached_data)
+        data = json.loads(cached_data)
+        market_data_cache.set(symbol, data)
+        return data
     
-    # Fallback to external API
+    # Fallback to external API, held to the same checks as the live feed
     data = await fetch_external_market_data(symbol)
     if data:
+        data = next(iter(validate_ticks(tick_validator, [data], datetime.utcnow())), None)
+    if data:
+        market_data_cache.set(symbol, data)
         return data
     
     raise HTTPException(status_code=404, detail="Market data not found")
@@ -361,14 +919,58 @@ async def get_market_data(symbol: str):
 async def get_multiple_market_data(symbols: str):
     """Get market data for multiple symbols"""
     symbol_list = symbols.split(",")
-    results = []
     
-    for symbol in symbol_list:
-        cached_data = redis_client.get(f"market_data:{symbol}")
-        if cached_data:
-            results.append(json.loads(cached_data))
+    # At most one MGET round trip regardless of watchlist size
+    quotes = await get_cached_quotes(symbol_list)
     
-    return results
+    return [quotes[symbol] for symbol in symbol_list if symbol in quotes]
+
+def to_watchlist_quotes(watchlist_id: Optional[str], name: str, symbols: List[str],
+                        quotes: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    # The watchlist is already resolved, so the stream needs no user header (browsers can't send one);
+    # past the per-connection limit the subscription would be refused, so no URL is offered
+    stream_url = None
+    if len(symbols) <= MAX_SYMBOLS_PER_SUBSCRIPTION:
+        stream_url = f"/ws/market-data?{urlencode({'symbols': ','.join(symbols)}, safe=',')}"
+    return {
+        "watchlist_id": watchlist_id,
+        "name": name,
+        "symbols": symbols,
+        "quotes": [quotes[symbol] for symbol in symbols if symbol in quotes],
+        "missing": [symbol for symbol in symbols if symbol not in quotes],
+        "stream_url": stream_url,
+        "timestamp": datetime.utcnow()
+    }
+
+@app.get("/api/v1/watchlists/{watchlist_id}/quotes", response_model=WatchlistQuotesResponse)
+async def get_watchlist_quotes(watchlist_id: str, request: Request):
+    """Quotes for a stored watchlist in one call: one lookup of its items and one batched cache read"""
+    user_id = request.headers.get("X-User-ID")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID not found in request")
+    
+    try:
+        watchlist = await resolve_watchlist(watchlist_id, user_id)
+        quotes = await get_cached_quotes(watchlist["symbols"])
+        return to_watchlist_quotes(watchlist_id, watchlist["name"], watchlist["symbols"], quotes)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching watchlist quotes: {e}")
+        raise HTTPException(status_code=500, detail="Error fetching watchlist quotes")
+
+@app.post("/api/v1/watchlists/quotes", response_model=WatchlistQuotesResponse)
+async def get_adhoc_watchlist_quotes(request: WatchlistRequest):
+    """Quotes for a watchlist given inline, e.g. one not saved yet"""
+    try:
+        symbols = list(dict.fromkeys(request.symbols))
+        quotes = await get_cached_quotes(symbols)
+        return to_watchlist_quotes(None, request.name, symbols, quotes)
+    
+    except Exception as e:
+        logger.error(f"Error fetching watchlist quotes: {e}")
+        raise HTTPException(status_code=500, detail="Error fetching watchlist quotes")
 
 @app.post("/api/v1/historical-data", response_model=List[HistoricalDataResponse])
 async def get_historical_data(request: HistoricalDataRequest):
@@ -384,66 +986,295 @@ async def get_historical_data(request: HistoricalDataRequest):
         }
         
         cursor = mongodb_db.historical_data.find(query).sort("timestamp", 1)
+        adjustments = await get_adjustment_table(request.symbol)
+        
+        if request.max_points:
+            return await downsample_historical_data(request, cursor, adjustments)
+        
         data = await cursor.to_list(length=request.limit or 1000)
         
-        return [
-            {
-                "symbol": item["symbol"],
-                "timestamp": item["timestamp"],
-                "open": item.get("open", item["price"]),
-                "high": item.get("high", item["price"]),
-                "low": item.get("low", item["price"]),
-                "close": item["price"],
-                "volume": item["volume"]
-            }
-            for item in data
-        ]
+        return to_historical_rows(data, adjustments)
     
     except Exception as e:
         logger.error(f"Error fetching historical data: {e}")
         raise HTTPException(status_code=500, detail="Error fetching historical data")
 
+async def downsample_historical_data(request: HistoricalDataRequest, cursor, adjustments: AdjustmentTable) -> List[Dict[str, Any]]:
+    """Reduce the whole range to max_points rows while paging through the cursor"""
+    downsampler = DOWNSAMPLERS[request.downsample.value](request.start_date, request.end_date, request.max_points)
+    rows = []
+    
+    def feed(items: List[Dict[str, Any]]):
+        rows.extend(downsampler.add(to_historical_rows(items, adjustments)))
+    
+    items = []
+    async for item in cursor.batch_size(EXPORT_BATCH_SIZE):
+        items.append(item)
+        if len(items) >= EXPORT_BATCH_SIZE:
+            feed(items)
+            items = []
+    if items:
+        feed(items)
+    
+    rows.extend(downsampler.finish())
+    return rows
+
+HISTORICAL_FIELDS = ["symbol", "timestamp", "open", "high", "low", "close", "volume", "adjusted_close", "adjusted_volume"]
+
+def to_historical_row(item: Dict[str, Any], adjustment_factor: float = 1.0, volume_factor: float = 1.0) -> Dict[str, Any]:
+    """Map a stored tick document to the OHLCV response shape"""
+    return {
+        "symbol": item["symbol"],
+        "timestamp": item["timestamp"],
+        "open": item.get("open", item["price"]),
+        "high": item.get("high", item["price"]),
+        "low": item.get("low", item["price"]),
+        "close": item["price"],
+        "volume": item["volume"],
+        "adjusted_close": item["price"] * adjustment_factor,
+        "adjusted_volume": int(round(item["volume"] * volume_factor))
+    }
+
+def to_historical_rows(items: List[Dict[str, Any]], adjustments: AdjustmentTable) -> List[Dict[str, Any]]:
+    """Rows with split/dividend adjusted closes and split adjusted volumes, so the two stay on one share basis"""
+    timestamps = [item["timestamp"] for item in items]
+    price_factors = adjustments.price_factors_at(timestamps).tolist()
+    volume_factors = adjustments.volume_factors_at(timestamps).tolist()
+    return [
+        to_historical_row(item, price_factor, volume_factor)
+        for item, price_factor, volume_factor in zip(items, price_factors, volume_factors)
+    ]
+
+async def stream_historical_export(request: HistoricalDataExportRequest):
+    """Page through the cursor and yield encoded chunks; memory stays bounded by one batch"""
+    query = {
+        "symbol": request.symbol,
+        "timestamp": {"$gte": request.start_date, "$lte": request.end_date}
+    }
+    cursor = mongodb_db.historical_data.find(query).sort("timestamp", 1).batch_size(EXPORT_BATCH_SIZE)
+    compressor = zlib.compressobj(wbits=31) if request.compress else None  # gzip container
+    adjustments = await get_adjustment_table(request.symbol)
+    
+    def encode(items: List[Dict[str, Any]], header: bool = False) -> bytes:
+        rows = to_historical_rows(items, adjustments)
+        for row in rows:
+            row["timestamp"] = row["timestamp"].isoformat()
+        
+        if request.format == ExportFormat.CSV:
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=HISTORICAL_FIELDS)
+            if header:
+                writer.writeheader()
+            writer.writerows(rows)
+            chunk = buffer.getvalue().encode()
+        else:
+            chunk = "".join(json.dumps(row, default=str) + "\n" for row in rows).encode()
+        return compressor.compress(chunk) if compressor else chunk
+    
+    items = []
+    first = True
+    async for item in cursor:
+        items.append(item)
+        if len(items) >= EXPORT_BATCH_SIZE:
+            yield encode(items, header=first)
+            items, first = [], False
+    
+    chunk = encode(items, header=first)
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+@app.post("/api/v1/historical-data/export")
+async def export_historical_data(request: HistoricalDataExportRequest):
+    """Stream historical data of any range as NDJSON or CSV, optionally gzip-compressed"""
+    extension = request.format.value
+    media_type = "text/csv" if request.format == ExportFormat.CSV else "application/x-ndjson"
+    if request.compress:
+        extension += ".gz"
+        media_type = "application/gzip"
+    
+    filename = f"{request.symbol}_{request.start_date:%Y%m%d}_{request.end_date:%Y%m%d}.{extension}"
+    return StreamingResponse(
+        stream_historical_export(request),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+async def load_price_series(symbol: str, start: datetime, end: datetime, since: Optional[datetime] = None):
+    """Prices over [start, end] (after `since` when given) as (datetime64[ns], prices)
+
+    The memory-mapped tick store only holds what this replica recorded, so
+    every stretch it doesn't cover is backfilled from historical_data: the
+    range before its first tick, gaps longer than TICK_GAP_THRESHOLD (the
+    replica was down, or its shard took the symbol over late) and the tail.
+    """
+    ticks = tick_store.read_range(symbol, since or start, end)
+    datetimes, prices = ticks.datetimes, ticks.prices
+    if since and len(ticks):
+        fresh = datetimes > np.datetime64(since, "ns")
+        datetimes, prices = datetimes[fresh], prices[fresh]
+    
+    # The newest ticks reach the store just after Mongo; leave them to the store so a
+    # cached series never holds both copies
+    lower = {"$gt": since} if since else {"$gte": start}
+    recent = end - timedelta(seconds=TICK_GAP_THRESHOLD)
+    if not len(datetimes):
+        ranges = [{**lower, "$lte": recent}]
+    else:
+        # Mongo keeps milliseconds, so its copy of a stored tick sorts at the truncated time
+        stored = datetimes.astype("datetime64[ms]").astype(datetime)
+        gap = np.timedelta64(int(TICK_GAP_THRESHOLD * 1e9), "ns")
+        holes = np.flatnonzero(np.diff(datetimes) > gap).tolist()
+        ranges = [{**lower, "$lt": stored[0]}]
+        ranges += [{"$gt": stored[i], "$lt": stored[i + 1]} for i in holes]
+        ranges.append({"$gt": stored[-1], "$lte": recent})
+    
+    cursor = mongodb_db.historical_data.find(
+        {"symbol": symbol, "$or": [{"timestamp": bounds} for bounds in ranges]},
+        {"timestamp": 1, "price": 1}
+    ).sort("timestamp", 1)
+    data = await cursor.to_list(length=None)
+    if data:
+        datetimes = np.concatenate([
+            np.array([item["timestamp"] for item in data], dtype="datetime64[ns]"), datetimes
+        ])
+        prices = np.concatenate([np.array([item["price"] for item in data], dtype=float), prices])
+        order = np.argsort(datetimes, kind="stable")
+        datetimes, prices = datetimes[order], prices[order]
+    return datetimes, prices
+
 @app.post("/api/v1/technical-indicators", response_model=TechnicalIndicatorResponse)
 async def calculate_technical_indicators(request: TechnicalIndicatorRequest):
     """Calculate technical indicators"""
     try:
-        # Get historical prices
-        query = {
-            "symbol": request.symbol,
-            "timestamp": {"$gte": datetime.utcnow() - timedelta(days=100)}
-        }
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=100)
+        adjustments = await get_adjustment_table(request.symbol)
         
-        cursor = mongodb_db.historical_data.find(query).sort("timestamp", 1)
-        data = await cursor.to_list(length=None)
+        # A cached series for the same adjustment version only needs the bars closed since
+        indicator_names = [indicator.value for indicator in request.indicators]
+        cache_key = indicator_cache.key(request.symbol, indicator_names, request.period)
+        series = await indicator_cache.get(cache_key, adjustments.version)
+        since = datetime.fromisoformat(series.last_timestamp) if series and series.last_timestamp else None
         
-        if not data:
+        # Stored history, then the memory-mapped tick store from its first tick on
+        datetimes, raw_prices = await load_price_series(request.symbol, start_date, end_date, since)
+        if not len(datetimes) and series is None:
             raise HTTPException(status_code=404, detail="No historical data found")
         
-        prices = [item["price"] for item in data]
-        timestamps = [item["timestamp"] for item in data]
+        # Indicators run on split/dividend adjusted prices so they don't jump across actions
+        prices = adjustments.adjust_prices(raw_prices, datetimes).tolist()
+        timestamps = np.datetime_as_string(datetimes, unit="us").tolist()
         
-        indicators = {}
+        if series is None:
+            series = IndicatorSeries(request.symbol, indicator_names, request.period, adjustments.version)
+            series.extend(prices, timestamps)
+            await indicator_cache.set(cache_key, series)
+        else:
+            indicator_cache.extend(series, prices, timestamps)
         
-        for indicator in request.indicators:
-            if indicator == "sma":
-                indicators["sma"] = calculate_sma(prices, request.period or 20)
-            elif indicator == "ema":
-                indicators["ema"] = calculate_ema(prices, request.period or 20)
-            elif indicator == "rsi":
-                indicators["rsi"] = calculate_rsi(prices, request.period or 14)
-            elif indicator == "macd":
-                indicators["macd"] = calculate_macd(prices)
+        indicators = {name: series.values[name] for name in indicator_names if name in series.values}
+        timestamps = series.timestamps
         
         return {
             "symbol": request.symbol,
             "indicators": indicators,
-            "timestamps": [ts.isoformat() for ts in timestamps[-len(list(indicators.values())[0]):]] if indicators else []
+            "timestamps": timestamps[-len(list(indicators.values())[0]):] if indicators else []
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error calculating indicators: {e}")
         raise HTTPException(status_code=500, detail="Error calculating indicators")
 
+async def get_adjustment_table(symbol: str) -> AdjustmentTable:
+    """Factor table for a symbol, precomputed when its actions were recorded"""
+    table = adjustment_cache.get(symbol)
+    if table is None:
+        document = await mongodb_db.adjustment_factors.find_one({"symbol": symbol})
+        table = AdjustmentTable.from_document(document) if document else AdjustmentTable.identity(symbol)
+        adjustment_cache.set(symbol, table)
+    return table
+
+async def rebuild_adjustment_table(symbol: str) -> AdjustmentTable:
+    """Recompute the cumulative factors from every recorded action and store them"""
+    actions = await mongodb_db.corporate_actions.find({"symbol": symbol}).to_list(length=None)
+    table = AdjustmentTable.build(symbol, actions, version=int(datetime.utcnow().timestamp() * 1000))
+    await mongodb_db.adjustment_factors.replace_one({"symbol": symbol}, table.to_document(), upsert=True)
+    adjustment_cache.set(symbol, table)
+    return table
+
+def to_corporate_action_response(action: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(action["_id"]),
+        "symbol": action["symbol"],
+        "action_type": action["action_type"],
+        "ex_date": action["ex_date"],
+        "announcement_date": action["announcement_date"],
+        "record_date": action.get("record_date"),
+        "payment_date": action.get("payment_date"),
+        "details": action.get("details", {}),
+        "adjustment_factor": action_factor(action)
+    }
+
+@app.post("/api/v1/corporate-actions", response_model=CorporateActionResponse)
+async def create_corporate_action(request: CorporateActionRequest):
+    """Record a corporate action and refresh the symbol's adjustment factors"""
+    try:
+        action_doc = {
+            "symbol": request.symbol,
+            "action_type": request.action_type,
+            "ex_date": request.ex_date,
+            "announcement_date": request.announcement_date or datetime.utcnow(),
+            "record_date": request.record_date,
+            "payment_date": request.payment_date,
+            "details": request.details,
+            "created_at": datetime.utcnow()
+        }
+        
+        if request.action_type == "dividend":
+            # The dividend factor is relative to the last close before the ex-date
+            reference_price = request.details.get("reference_price")
+            if reference_price is None:
+                previous = await mongodb_db.historical_data.find_one(
+                    {"symbol": request.symbol, "timestamp": {"$lt": request.ex_date}},
+                    sort=[("timestamp", -1)]
+                )
+                if previous is None:
+                    raise HTTPException(
+                        status_code=400,
+                        detail="No close before the ex-date; provide details.reference_price"
+                    )
+                reference_price = previous["price"]
+            if request.details["amount"] >= reference_price:
+                raise HTTPException(status_code=400, detail="Dividend amount must be below the reference price")
+            action_doc["reference_price"] = reference_price
+        
+        result = await mongodb_db.corporate_actions.insert_one(action_doc)
+        await rebuild_adjustment_table(request.symbol)
+        
+        return to_corporate_action_response({**action_doc, "_id": result.inserted_id})
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error recording corporate action: {e}")
+        raise HTTPException(status_code=500, detail="Error recording corporate action")
+
+@app.get("/api/v1/corporate-actions/{symbol}", response_model=List[CorporateActionResponse])
+async def get_corporate_actions(symbol: str):
+    """Corporate actions recorded for a symbol, oldest ex-date first"""
+    try:
+        cursor = mongodb_db.corporate_actions.find({"symbol": symbol.upper()}).sort("ex_date", 1)
+        actions = await cursor.to_list(length=None)
+        return [to_corporate_action_response(action) for action in actions]
+    
+    except Exception as e:
+        logger.error(f"Error fetching corporate actions: {e}")
+        raise HTTPException(status_code=500, detail="Error fetching corporate actions")
+
 @app.post("/api/v1/market-alerts", response_model=MarketAlertResponse)
 async def create_market_alert(request: MarketAlertRequest):
     """Create a market alert"""
@@ -451,7 +1282,7 @@ async def create_market_alert(request: MarketAlertRequest):
         alert_doc = {
             "user_id": request.user_id,
             "symbol": request.symbol,
-            "condition": request.condition,
+            "condition": request.condition.value,
             "target_value": request.target_value,
             "message": request.message,
             "is_active": True,
@@ -459,6 +1290,7 @@ async def create_market_alert(request: MarketAlertRequest):
         }
         
         result = await mongodb_db.market_alerts.insert_one(alert_doc)
+        alert_engine.add(alert_doc)
         
         return {
             "id": str(result.inserted_id),
@@ -506,6 +1338,7 @@ async def delete_market_alert(alert_id: str):
     try:
         from bson import ObjectId
         result = await mongodb_db.market_alerts.delete_one({"_id": ObjectId(alert_id)})
+        alert_engine.remove(alert_id)
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Alert not found")
@@ -516,6 +1349,273 @@ async def delete_market_alert(alert_id: str):
         logger.error(f"Error deleting alert: {e}")
         raise HTTPException(status_code=500, detail="Error deleting alert")
 
+@app.post("/api/v1/market-scanner", response_model=MarketScannerResponse)
+async def scan_market(request: MarketScannerRequest):
+    """Screen the live quote universe against price, volume and indicator criteria"""
+    try:
+        total_matches, results = market_scanner.scan(request.criteria, request.limit or 50)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "symbols": [result["symbol"] for result in results],
+        "results": results,
+        "total_matches": total_matches,
+        "scan_timestamp": datetime.utcnow()
+    }
+
+@app.get("/api/v1/volume-analysis/{symbol}", response_model=VolumeAnalysisResponse)
+async def get_volume_analysis(symbol: str):
+    """Current intraday volume against the symbol's time-of-day baseline"""
+    analysis = volume_baselines.analysis(symbol.upper())
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="No volume data for symbol")
+    
+    return analysis
+
+async def load_option_chain(symbol: str) -> Dict[str, Any]:
+    """Contracts for an underlying as column arrays, cached for OPTION_CHAIN_CACHE_TTL"""
+    chain = option_chain_cache.get(symbol)
+    if chain:
+        return chain
+    
+    cursor = mongodb_db.option_chains.find({"underlying_symbol": symbol}).sort(
+        [("expiration_date", 1), ("strike_price", 1)]
+    )
+    contracts = await cursor.to_list(length=None)
+    
+    def column(field):
+        return np.array([c.get(field) if c.get(field) is not None else np.nan for c in contracts], dtype=float)
+    
+    bid, ask, last_price = column("bid"), column("ask"), column("last_price")
+    mid = np.where(np.isnan(bid) | np.isnan(ask), last_price, (bid + ask) / 2)
+    chain = {
+        "contracts": contracts,
+        "strikes": column("strike_price"),
+        "expirations": np.array([c["expiration_date"] for c in contracts], dtype="datetime64[us]"),
+        "is_call": np.array([c["option_type"] == "call" for c in contracts], dtype=bool),
+        "market_prices": mid,
+        "stored_iv": column("implied_volatility")
+    }
+    option_chain_cache.set(symbol, chain)
+    return chain
+
+@app.post("/api/v1/option-chain", response_model=List[OptionChainResponse])
+async def get_option_chain(request: OptionChainRequest):
+    """Option chain with implied volatility and Greeks priced against the live underlying"""
+    try:
+        chain = await load_option_chain(request.symbol)
+        if not chain["contracts"]:
+            raise HTTPException(status_code=404, detail="No option chain found")
+        
+        underlying = await get_market_data(request.symbol)
+        spot = float(underlying["price"])
+        now = datetime.utcnow()
+        
+        # Select contracts with array masks rather than per-contract filtering
+        selected = np.ones(len(chain["contracts"]), dtype=bool)
+        if request.expiration_date:
+            expiry_day = np.datetime64(request.expiration_date.date(), "D")
+            selected &= chain["expirations"].astype("datetime64[D]") == expiry_day
+        if request.option_type in ("call", "put"):
+            selected &= chain["is_call"] == (request.option_type == "call")
+        selected &= chain["expirations"] > np.datetime64(now, "us")
+        indices = np.flatnonzero(selected)
+        
+        strikes = chain["strikes"][indices]
+        is_call = chain["is_call"][indices]
+        years = (chain["expirations"][indices] - np.datetime64(now, "us")) / np.timedelta64(365 * 86400, "s")
+        
+        iv = implied_volatility(chain["market_prices"][indices], spot, strikes, years, RISK_FREE_RATE, is_call)
+        # Contracts without a usable quote keep their stored volatility
+        iv = np.where(np.isnan(iv), chain["stored_iv"][indices], iv)
+        greeks = black_scholes(spot, strikes, years, RISK_FREE_RATE, np.where(np.isnan(iv), 0.3, iv), is_call)
+        
+        results = []
+        for position, index in enumerate(indices.tolist()):
+            contract = chain["contracts"][index]
+            vol = float(iv[position])
+            results.append({
+                "underlying_symbol": request.symbol,
+                "expiration_date": contract["expiration_date"],
+                "strike_price": contract["strike_price"],
+                "option_type": contract["option_type"],
+                "bid": contract.get("bid"),
+                "ask": contract.get("ask"),
+                "last_price": contract.get("last_price"),
+                "volume": contract.get("volume"),
+                "open_interest": contract.get("open_interest"),
+                "implied_volatility": None if np.isnan(vol) else round(vol, 6),
+                "greeks": {
+                    name: round(float(greeks[name][position]), 6)
+                    for name in ("price", "delta", "gamma", "theta", "vega")
+                },
+                "timestamp": now
+            })
+        
+        return results
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error pricing option chain: {e}")
+        raise HTTPException(status_code=500, detail="Error pricing option chain")
+
+@app.post("/api/v1/replay", response_model=ReplayStatusResponse)
+async def start_replay(request: ReplayRequest):
+    """Replay recorded ticks from historical_data or a file in place of the live feed"""
+    global replay_session
+    
+    if replay_session and replay_session.running:
+        raise HTTPException(status_code=409, detail="A replay is already running")
+    
+    if request.source == ReplaySourceType.FILE:
+        try:
+            path = resolve_replay_path(REPLAY_DATA_PATH, request.file_path)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        source = file_source(path, request.symbols)
+        description = f"file:{request.file_path}"
+    else:
+        source = historical_source(
+            mongodb_db.historical_data, request.symbols, request.start_date, request.end_date,
+            batch_size=EXPORT_BATCH_SIZE
+        )
+        description = "historical_data"
+    
+    # One replay at a time across replicas; holding the lock pauses every live producer
+    if not await redis_client.set(REPLAY_LOCK_KEY, REPLICA_ID, nx=True, px=int(REPLAY_LOCK_TTL * 1000)):
+        holder = await redis_client.get(REPLAY_LOCK_KEY)
+        raise HTTPException(status_code=409, detail=f"A replay is already running on {holder or 'another replica'}")
+    
+    validator = new_tick_validator()
+    replay_id = f"{REPLICA_ID}:{datetime.utcnow().isoformat()}"
+    replay_session = ReplaySession(
+        source,
+        lambda tick_time, updates: publish_replay_batch(tick_time, updates, validator, replay_id),
+        speed=request.speed,
+        description=description
+    )
+    replay_session.start()
+    asyncio.create_task(hold_replay_lock(replay_session))
+    logger.info(f"Started {description} replay at speed {request.speed}")
+    return replay_session.status()
+
+@app.get("/api/v1/replay", response_model=ReplayStatusResponse)
+async def get_replay_status():
+    """Progress of the current or last replay"""
+    if replay_session is None:
+        raise HTTPException(status_code=404, detail="No replay has been started")
+    return replay_session.status()
+
+@app.delete("/api/v1/replay", response_model=ReplayStatusResponse)
+async def stop_replay():
+    """Stop the running replay; the live feed resumes on its next cycle"""
+    if replay_session is None:
+        raise HTTPException(status_code=404, detail="No replay has been started")
+    if replay_session.running:
+        await replay_session.stop()
+        await redis_client.delete(REPLAY_LOCK_KEY)
+    return replay_session.status()
+
+@app.post("/api/v1/indices", response_model=MarketIndexResponse)
+async def create_market_index(request: MarketIndexRequest):
+    """Define or redefine a market index computed from its constituents' ticks"""
+    try:
+        index_doc = {
+            "symbol": request.symbol,
+            "name": request.name,
+            "constituents": request.constituents,
+            "weighting": request.weighting,
+            "shares": request.shares,
+            "base_value": request.base_value,
+            "updated_at": datetime.utcnow()
+        }
+        update = {"$set": index_doc}
+        if request.divisor is not None:
+            index_doc["divisor"] = request.divisor
+        else:
+            # Keep a stored divisor; the engine re-derives it if constituents changed
+            update["$setOnInsert"] = {"divisor": None}
+        
+        await mongodb_db.market_indices.update_one({"symbol": request.symbol}, update, upsert=True)
+        await load_market_indices()
+        
+        return index_engine.snapshot(request.symbol)
+    
+    except Exception as e:
+        logger.error(f"Error defining market index: {e}")
+        raise HTTPException(status_code=500, detail="Error defining market index")
+
+@app.get("/api/v1/indices", response_model=List[MarketIndexResponse])
+async def get_market_indices():
+    """Current value of every defined index"""
+    now = datetime.utcnow()
+    return [index_engine.snapshot(index_symbol, now) for index_symbol in index_engine.symbols]
+
+def market_status(market: str) -> str:
+    session = market_calendar.session(market)
+    return "open" if session == "regular" else session
+
+@app.get("/api/v1/market-calendar/{market}", response_model=List[MarketCalendarResponse])
+async def get_market_calendar(market: str, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """Sessions, early closes and holidays per day (defaults to the next 30 days)"""
+    start_date = start_date or datetime.utcnow().date()
+    end_date = end_date or start_date + timedelta(days=30)
+    if end_date < start_date or (end_date - start_date).days > 366:
+        raise HTTPException(status_code=400, detail="Date range must be between 0 and 366 days")
+    
+    try:
+        return [
+            market_calendar.day(market, start_date + timedelta(days=offset))
+            for offset in range((end_date - start_date).days + 1)
+        ]
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/api/v1/market-calendar/{market}/settlement-date")
+async def get_settlement_date(market: str, trade_date: date, days: int = 1):
+    """Trade date plus `days` trading sessions (T+1 by default)"""
+    if days < 0 or days > 30:
+        raise HTTPException(status_code=400, detail="days must be between 0 and 30")
+    try:
+        return {
+            "market": market.upper(),
+            "trade_date": trade_date,
+            "settlement_date": market_calendar.add_trading_days(market, trade_date, days)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/api/v1/market-calendar/{market}/expiration-date")
+async def get_expiration_date(market: str, year: int, month: int):
+    """Standard monthly option expiration, moved earlier when it falls on a holiday"""
+    if month < 1 or month > 12:
+        raise HTTPException(status_code=400, detail="month must be between 1 and 12")
+    try:
+        return {
+            "market": market.upper(),
+            "expiration_date": market_calendar.expiration_date(market, year, month)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/api/v1/market-status/{market}", response_model=MarketStatusResponse)
+async def get_market_status(market: str):
+    """Current session for a market"""
+    now = datetime.utcnow()
+    try:
+        session = market_calendar.session(market, now)
+        return {
+            "market": market.upper(),
+            "session": session,
+            "is_open": session == "regular",
+            "next_open": market_calendar.next_open(market, now),
+            "timestamp": now
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 # Public endpoints (no authentication required)
 @app.get("/api/v1/public/market-overview")
 async def get_market_overview():
@@ -523,17 +1623,14 @@ async def get_market_overview():
     try:
         # Get data for major indices/symbols
         major_symbols = ["AAPL", "GOOGL", "MSFT", "TSLA", "AMZN"]
-        overview = []
-        
-        for symbol in major_symbols:
-            cached_data = redis_client.get(f"market_data:{symbol}")
-            if cached_data:
-                overview.append(json.loads(cached_data))
+        cached_values = await redis_client.mget([f"market_data:{symbol}" for symbol in major_symbols])
+        overview = [json.loads(cached_data) for cached_data in cached_values if cached_data]
         
         return {
             "timestamp": datetime.utcnow().isoformat(),
-            "market_status": "open",  # Would determine actual market status
-            "major_stocks": overview
+            "market_status": market_status(MARKET_CALENDAR),
+            "major_stocks": overview,
+            "indices": [index_engine.snapshot(index_symbol) for index_symbol in index_engine.symbols]
         }
     
     except Exception as e:
@@ -544,11 +1641,24 @@ async def get_market_overview():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    try:
+        redis_connected = await redis_client.ping() if redis_client else False
+    except redis.asyncio.RedisError:
+        redis_connected = False
+    
     return {
         "status": "healthy",
         "service": "market-data",
-        "redis_connected": redis_client.ping() if redis_client else False,
-        "mongodb_connected": True  # Would check MongoDB connection
+        "redis_connected": redis_connected,
+        "mongodb_connected": True,  # Would check MongoDB connection
+        "quote_cache": market_data_cache.stats(),
+        "upstream": upstream_client.stats(),
+        "websockets": manager.stats(),
+        "alerts": alert_engine.stats(),
+        "indicator_cache": indicator_cache.stats(),
+        "tick_validation": tick_validator.stats(),
+        "sharding": shard_coordinator.stats() if shard_coordinator else None,
+        "quote_ring": quote_ring.stats() if quote_ring else None
     }
 
 if __name__ == "__main__":
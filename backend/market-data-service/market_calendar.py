@@ -0,0 +1,276 @@
+"""
+Market Data Service Calendar - Casa de Valores Information System
+Rule-based exchange holidays and sessions precomputed per year for constant-time lookups
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+SESSION_TYPES = ("pre_market", "regular", "after_hours")
+CLOSED = "closed"
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th given weekday of a month (n = -1 for the last one)"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(day: date) -> date:
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+def us_equity_holidays(year: int) -> Dict[date, str]:
+    """NYSE/NASDAQ full-day holidays"""
+    holidays = {}
+    new_year = date(year, 1, 1)
+    # A Saturday New Year's Day is not moved back into the previous year
+    if new_year.weekday() != 5:
+        holidays[_observed(new_year)] = "New Year's Day"
+    if year >= 1998:
+        holidays[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    holidays[_nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    holidays[_easter(year) - timedelta(days=2)] = "Good Friday"
+    holidays[_nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        holidays[_observed(date(year, 6, 19))] = "Juneteenth National Independence Day"
+    holidays[_observed(date(year, 7, 4))] = "Independence Day"
+    holidays[_nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    holidays[_nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    holidays[_observed(date(year, 12, 25))] = "Christmas Day"
+    return holidays
+
+def us_equity_early_closes(year: int, holidays: Dict[date, str]) -> List[date]:
+    """Half days: the day before Independence Day, the day after Thanksgiving and Christmas Eve"""
+    candidates = [
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    ]
+    return [day for day in candidates if day.weekday() < 5 and day not in holidays]
+
+# Session boundaries in exchange local time: pre-market start, open, close, after-hours end
+MARKETS: Dict[str, Dict[str, Any]] = {
+    market: {
+        "timezone": "America/New_York",
+        "sessions": (time(4, 0), time(9, 30), time(16, 0), time(20, 0)),
+        "early_close": (time(13, 0), time(17, 0)),
+        "holidays": us_equity_holidays,
+        "early_closes": us_equity_early_closes,
+    }
+    for market in ("NYSE", "NASDAQ")
+}
+
+class _YearCalendar:
+    """Session bounds for every day of one year as epoch seconds; zeros mark closed days
+
+    Row i is local date first_ordinal + i, columns are pre-market start,
+    regular open, regular close and after-hours end.
+    """
+
+    __slots__ = ("year", "first_ordinal", "bounds", "holidays", "early_closes")
+
+    def __init__(self, market: str, year: int, overrides: Dict[date, Dict[str, Any]]):
+        spec = MARKETS[market]
+        zone = ZoneInfo(spec["timezone"])
+        self.year = year
+        self.first_ordinal = date(year, 1, 1).toordinal()
+        self.holidays = spec["holidays"](year)
+        self.early_closes = set(spec["early_closes"](year, self.holidays))
+        # Stored MarketHoliday documents add closures and half days the rules don't know about
+        for day, override in overrides.items():
+            if day.year != year:
+                continue
+            if override.get("is_partial_day"):
+                self.early_closes.add(day)
+            else:
+                self.holidays[day] = override["name"]
+
+        days = date(year + 1, 1, 1).toordinal() - self.first_ordinal
+        self.bounds = np.zeros((days, 4), dtype=np.int64)
+        for offset in range(days):
+            day = date.fromordinal(self.first_ordinal + offset)
+            if day.weekday() >= 5 or day in self.holidays:
+                continue
+            sessions = list(spec["sessions"])
+            if day in self.early_closes:
+                sessions[2], sessions[3] = spec["early_close"]
+                override = overrides.get(day)
+                if override and override.get("early_close_time"):
+                    sessions[2] = override["early_close_time"].time()
+            self.bounds[offset] = [
+                int(datetime.combine(day, boundary, tzinfo=zone).timestamp()) for boundary in sessions
+            ]
+
+class MarketCalendar:
+    """Trading calendar per market, built lazily one year at a time
+
+    Session checks index the year table directly, so asking whether a
+    market is open costs a few array lookups and never recomputes holiday
+    rules.
+    """
+
+    def __init__(self):
+        self._years: Dict[Tuple[str, int], _YearCalendar] = {}
+        self._overrides: Dict[str, Dict[date, Dict[str, Any]]] = {}
+        # market -> (UTC day ordinal, session bounds of the local dates around it)
+        self._windows: Dict[str, Tuple[int, List[List[int]]]] = {}
+
+    @property
+    def markets(self) -> List[str]:
+        return list(MARKETS)
+
+    def load_overrides(self, holidays: Iterable[Dict[str, Any]]):
+        """Apply MarketHoliday documents and rebuild affected markets on next use"""
+        overrides: Dict[str, Dict[date, Dict[str, Any]]] = {}
+        for holiday in holidays:
+            market = holiday.get("market", "").upper()
+            if market in MARKETS:
+                overrides.setdefault(market, {})[holiday["date"].date()] = holiday
+        self._overrides = overrides
+        self._years.clear()
+        self._windows.clear()
+
+    def timezone(self, market: str) -> str:
+        return MARKETS[self._market(market)]["timezone"]
+
+    def _market(self, market: str) -> str:
+        market = market.upper()
+        if market not in MARKETS:
+            raise ValueError(f"Unknown market: {market}")
+        return market
+
+    def _year(self, market: str, year: int) -> _YearCalendar:
+        calendar = self._years.get((market, year))
+        if calendar is None:
+            calendar = _YearCalendar(market, year, self._overrides.get(market, {}))
+            self._years[(market, year)] = calendar
+        return calendar
+
+    def _day_bounds(self, market: str, day: date) -> np.ndarray:
+        calendar = self._year(market, day.year)
+        return calendar.bounds[day.toordinal() - calendar.first_ordinal]
+
+    @staticmethod
+    def _epoch(timestamp: Optional[datetime]) -> int:
+        # Naive datetimes are UTC throughout the service
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc)
+        elif timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return int(timestamp.timestamp())
+
+    def session(self, market: str, timestamp: Optional[datetime] = None) -> str:
+        """pre_market, regular, after_hours or closed"""
+        market = self._market(market)
+        epoch = self._epoch(timestamp)
+        ordinal = epoch // 86400 + UNIX_EPOCH_ORDINAL
+        window = self._windows.get(market)
+        if window is None or window[0] != ordinal:
+            # The local trading date is within a day of the UTC date
+            rows = [self._day_bounds(market, date.fromordinal(day)).tolist() for day in (ordinal, ordinal - 1, ordinal + 1)]
+            window = self._windows[market] = (ordinal, rows)
+        for pre_start, open_at, close_at, after_end in window[1]:
+            if pre_start <= epoch < after_end:
+                if epoch < open_at:
+                    return "pre_market"
+                return "regular" if epoch < close_at else "after_hours"
+        return CLOSED
+
+    def trading_date(self, market: str, timestamp: Optional[datetime] = None) -> date:
+        """Local date of the session the timestamp falls in, or of the last one before it"""
+        market = self._market(market)
+        epoch = self._epoch(timestamp)
+        # A session counts from its pre-market start, which can be on the next UTC date
+        day = date.fromordinal(epoch // 86400 + UNIX_EPOCH_ORDINAL + 1)
+        while True:
+            pre_start = self._day_bounds(market, day)[0]
+            if pre_start and pre_start <= epoch:
+                return day
+            day -= timedelta(days=1)
+
+    def is_open(self, market: str, timestamp: Optional[datetime] = None) -> bool:
+        return self.session(market, timestamp) == "regular"
+
+    def is_trading_day(self, market: str, day: date) -> bool:
+        return bool(self._day_bounds(self._market(market), day)[1])
+
+    def day(self, market: str, day: date) -> Dict[str, Any]:
+        """One date in MarketCalendarResponse shape, times as naive UTC"""
+        market = self._market(market)
+        calendar = self._year(market, day.year)
+        _, open_at, close_at, _ = self._day_bounds(market, day)
+
+        def utc(epoch):
+            return datetime.utcfromtimestamp(int(epoch)) if epoch else None
+
+        return {
+            "date": datetime.combine(day, time()),
+            "market": market,
+            "is_open": bool(open_at),
+            "session_start": utc(open_at),
+            "session_end": utc(close_at),
+            "early_close": utc(close_at) if day in calendar.early_closes and open_at else None,
+            "holiday_name": calendar.holidays.get(day),
+        }
+
+    def trading_days(self, market: str, start: date, end: date) -> List[date]:
+        market = self._market(market)
+        days = []
+        day = start
+        while day <= end:
+            if self._day_bounds(market, day)[1]:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def add_trading_days(self, market: str, day: date, count: int) -> date:
+        """Trading date `count` sessions after `day` (before it when negative), e.g. T+1 settlement"""
+        market = self._market(market)
+        step = 1 if count >= 0 else -1
+        remaining = abs(count)
+        while remaining:
+            day += timedelta(days=step)
+            if self._day_bounds(market, day)[1]:
+                remaining -= 1
+        return day
+
+    def expiration_date(self, market: str, year: int, month: int) -> date:
+        """Standard monthly expiry: third Friday, or the trading day before it on a holiday"""
+        day = _nth_weekday(year, month, 4, 3)
+        if not self.is_trading_day(market, day):
+            day = self.add_trading_days(market, day, -1)
+        return day
+
+    def next_open(self, market: str, timestamp: Optional[datetime] = None) -> datetime:
+        """Next regular session open at or after the timestamp, as naive UTC"""
+        market = self._market(market)
+        epoch = self._epoch(timestamp)
+        day = date.fromordinal(epoch // 86400 + UNIX_EPOCH_ORDINAL - 1)
+        while True:
+            open_at = self._day_bounds(market, day)[1]
+            if open_at and open_at >= epoch:
+                return datetime.utcfromtimestamp(int(open_at))
+            day += timedelta(days=1)
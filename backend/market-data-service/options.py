@@ -0,0 +1,122 @@
+"""
+Market Data Service Options Pricing - Casa de Valores Information System
+Vectorized Black-Scholes pricing, Greeks and implied volatility for option chains
+"""
+
+from typing import Dict
+
+import numpy as np
+
+SQRT_2PI = np.sqrt(2 * np.pi)
+MIN_VOLATILITY = 1e-4
+MAX_VOLATILITY = 5.0
+
+def _erf(x: np.ndarray) -> np.ndarray:
+    """Vectorized error function (Abramowitz & Stegun 7.1.26, |error| < 1.5e-7)"""
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return sign * (1.0 - poly * np.exp(-x * x))
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + _erf(x / np.sqrt(2.0)))
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+def _d1_d2(spot, strikes, years, rate, volatility):
+    vol_sqrt_t = volatility * np.sqrt(years)
+    d1 = (np.log(spot / strikes) + (rate + 0.5 * volatility ** 2) * years) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+def black_scholes(
+    spot: float,
+    strikes: np.ndarray,
+    years: np.ndarray,
+    rate: float,
+    volatility: np.ndarray,
+    is_call: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Price and Greeks for every contract at once
+
+    Arrays broadcast against each other; theta is per calendar day and vega
+    per 1.00 (100 percentage points) of volatility.
+    """
+    strikes = np.asarray(strikes, dtype=float)
+    years = np.maximum(np.asarray(years, dtype=float), 1e-8)
+    volatility = np.maximum(np.asarray(volatility, dtype=float), MIN_VOLATILITY)
+    is_call = np.asarray(is_call, dtype=bool)
+
+    d1, d2 = _d1_d2(spot, strikes, years, rate, volatility)
+    discount = np.exp(-rate * years)
+    pdf_d1 = norm_pdf(d1)
+    sqrt_t = np.sqrt(years)
+
+    call_price = spot * norm_cdf(d1) - strikes * discount * norm_cdf(d2)
+    put_price = strikes * discount * norm_cdf(-d2) - spot * norm_cdf(-d1)
+
+    decay = -spot * pdf_d1 * volatility / (2 * sqrt_t)
+    call_theta = decay - rate * strikes * discount * norm_cdf(d2)
+    put_theta = decay + rate * strikes * discount * norm_cdf(-d2)
+
+    return {
+        "price": np.where(is_call, call_price, put_price),
+        "delta": np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1.0),
+        "gamma": pdf_d1 / (spot * volatility * sqrt_t),
+        "theta": np.where(is_call, call_theta, put_theta) / 365.0,
+        "vega": spot * pdf_d1 * sqrt_t,
+    }
+
+def implied_volatility(
+    prices: np.ndarray,
+    spot: float,
+    strikes: np.ndarray,
+    years: np.ndarray,
+    rate: float,
+    is_call: np.ndarray,
+    tolerance: float = 1e-6,
+    max_iterations: int = 50,
+) -> np.ndarray:
+    """Batched implied volatility solver
+
+    Runs safeguarded Newton steps for all contracts together: each contract
+    keeps a [low, high] bracket and falls back to bisection whenever the
+    Newton step leaves it or vega is too small. Prices outside no-arbitrage
+    bounds come back as NaN.
+    """
+    prices = np.asarray(prices, dtype=float)
+    strikes = np.asarray(strikes, dtype=float)
+    years = np.maximum(np.asarray(years, dtype=float), 1e-8)
+    is_call = np.asarray(is_call, dtype=bool)
+    prices, strikes, years, is_call = np.broadcast_arrays(prices, strikes, years, is_call)
+
+    discount = np.exp(-rate * years)
+    intrinsic = np.where(is_call, np.maximum(spot - strikes * discount, 0.0), np.maximum(strikes * discount - spot, 0.0))
+    upper_bound = np.where(is_call, spot, strikes * discount)
+    solvable = np.isfinite(prices) & (prices > intrinsic) & (prices < upper_bound)
+
+    low = np.full(prices.shape, MIN_VOLATILITY)
+    high = np.full(prices.shape, MAX_VOLATILITY)
+    sigma = np.full(prices.shape, 0.3)
+    active = solvable.copy()
+
+    for _ in range(max_iterations):
+        if not active.any():
+            break
+
+        result = black_scholes(spot, strikes, years, rate, sigma, is_call)
+        diff = result["price"] - prices
+        converged = np.abs(diff) < tolerance
+        active &= ~converged
+
+        # Price is increasing in volatility, so the sign of diff tightens the bracket
+        high = np.where(active & (diff > 0), sigma, high)
+        low = np.where(active & (diff < 0), sigma, low)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = sigma - diff / result["vega"]
+        use_newton = (result["vega"] > 1e-8) & (newton > low) & (newton < high)
+        sigma = np.where(active, np.where(use_newton, newton, 0.5 * (low + high)), sigma)
+
+    return np.where(solvable, sigma, np.nan)
@@ -0,0 +1,69 @@
+"""
+Market Data Service Quote Cache - Casa de Valores Information System
+Bounded in-process cache (TTL + LRU eviction) for latest quotes
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class QuoteCache:
+    """Latest-value cache keyed by symbol with per-entry TTL and LRU eviction"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 5.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.peek(symbol) is not None
+
+    def set(self, symbol: str, value: Dict[str, Any]):
+        """Store a quote, evicting the least recently used entries when full"""
+        self._entries[symbol] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh quote and record the hit or miss"""
+        entry = self._entries.get(symbol)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[symbol]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(symbol)
+        self.hits += 1
+        return value
+
+    def peek(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh quote without touching statistics or LRU order"""
+        entry = self._entries.get(symbol)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
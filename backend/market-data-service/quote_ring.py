@@ -0,0 +1,328 @@
+"""
+Market Data Service Quote Ring - Casa de Valores Information System
+Latest quotes in a shared memory file with seqlock-versioned slots for co-located readers
+
+The module depends only on numpy so other services on the same host can
+import QuoteRingReader directly.
+
+File layout (little-endian):
+    header        64 bytes   magic, layout version, capacities, generation, state, update head
+    symbol table  16 bytes per slot, NUL-padded ASCII symbol
+    slots         64 bytes per slot, seq followed by the quote fields
+    update ring   16 bytes per entry, (update number, slot) of recent writes
+
+A slot's seq is odd while the writer is updating it. Readers copy the fields
+and retry until they see the same even seq before and after the copy. This
+relies on stores becoming visible in program order, which holds on x86-64.
+Slots are never reassigned while a file is live, so a symbol's slot can be
+cached by readers.
+"""
+
+import mmap
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"CASAQRB1"
+LAYOUT_VERSION = 1
+SYMBOL_BYTES = 16
+SLOT_BYTES = 64
+RING_ENTRY_BYTES = 16
+
+STATE_LIVE = 1
+STATE_CLOSED = 2
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("slot_count", "<u4"),
+    ("ring_capacity", "<u4"),
+    ("symbols_used", "<u4"),
+    ("generation", "<u8"),
+    ("state", "<u4"),
+    ("_reserved", "<u4"),
+    ("head", "<u8"),
+    ("_padding", "V16"),
+])
+
+# Everything in a slot after its 8-byte seq
+QUOTE_DTYPE = np.dtype([
+    ("price", "<f8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("change", "<f8"),
+    ("change_percent", "<f8"),
+    ("volume", "<i8"),
+    ("timestamp_ns", "<i8"),
+])
+
+RING_DTYPE = np.dtype([("update", "<u8"), ("slot", "<u4"), ("_padding", "<u4")])
+
+assert HEADER_DTYPE.itemsize == 64 and QUOTE_DTYPE.itemsize + 8 == SLOT_BYTES
+
+def _layout(slot_count: int, ring_capacity: int) -> Tuple[int, int, int, int]:
+    """Offsets of the symbol table, slots and update ring, and the total size"""
+    symbols_offset = HEADER_DTYPE.itemsize
+    slots_offset = symbols_offset + slot_count * SYMBOL_BYTES
+    slots_offset += -slots_offset % SLOT_BYTES  # cache-line align the slots
+    ring_offset = slots_offset + slot_count * SLOT_BYTES
+    return symbols_offset, slots_offset, ring_offset, ring_offset + ring_capacity * RING_ENTRY_BYTES
+
+class _Mapping:
+    """numpy views over one mapped quote ring file"""
+
+    def __init__(self, buffer, slot_count: int, ring_capacity: int):
+        symbols_offset, slots_offset, ring_offset, _ = _layout(slot_count, ring_capacity)
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buffer)
+        self.symbols = np.ndarray(slot_count, dtype=f"S{SYMBOL_BYTES}", buffer=buffer, offset=symbols_offset)
+        self.seq = np.ndarray(slot_count, dtype="<u8", buffer=buffer, offset=slots_offset, strides=(SLOT_BYTES,))
+        self.quotes = np.ndarray(slot_count, dtype=QUOTE_DTYPE, buffer=buffer, offset=slots_offset + 8,
+                                 strides=(SLOT_BYTES,))
+        self.ring = np.ndarray(ring_capacity, dtype=RING_DTYPE, buffer=buffer, offset=ring_offset)
+
+def _timestamp_ns(timestamp: Any) -> int:
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return int(np.datetime64(timestamp, "ns").astype(np.int64))
+
+def _float(value: Any) -> float:
+    return float("nan") if value is None else float(value)
+
+class QuoteRingWriter:
+    """Single writer; publishes each quote into its symbol's slot and appends to the update ring
+
+    The file is built under a temporary name and renamed into place, so a
+    restart never exposes a half-initialized layout. The previous file, if
+    any, is marked closed so attached readers know to reopen.
+    """
+
+    def __init__(self, path: str, slot_count: int = 8192, ring_capacity: int = 65536,
+                 symbols: Optional[List[str]] = None):
+        self.path = path
+        self.slot_count = slot_count
+        self.ring_capacity = ring_capacity
+        self._slots: Dict[str, int] = {}
+        self.overflow = 0
+
+        *_, size = _layout(slot_count, ring_capacity)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.truncate(size)
+        self._file = open(temporary, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self._view = _Mapping(self._mmap, slot_count, ring_capacity)
+
+        header = self._view.header
+        header["magic"] = MAGIC
+        header["version"] = LAYOUT_VERSION
+        header["slot_count"] = slot_count
+        header["ring_capacity"] = ring_capacity
+        header["generation"] = time.time_ns()
+        for symbol in symbols or ():
+            self.slot(symbol)
+        header["state"] = STATE_LIVE
+
+        _mark_closed(path)
+        os.replace(temporary, path)
+
+    def slot(self, symbol: str) -> Optional[int]:
+        """Slot for a symbol, assigning the next free one on first sight"""
+        slot = self._slots.get(symbol)
+        if slot is None:
+            encoded = symbol.encode("ascii")
+            if len(self._slots) >= self.slot_count or len(encoded) >= SYMBOL_BYTES:
+                return None
+            slot = len(self._slots)
+            self._view.symbols[slot] = encoded
+            self._slots[symbol] = slot
+            # Publish the name before readers can discover the slot
+            self._view.header["symbols_used"] = slot + 1
+        return slot
+
+    def write(self, market_data: Dict[str, Any]):
+        slot = self.slot(market_data["symbol"])
+        if slot is None:
+            self.overflow += 1
+            return
+
+        # Convert before taking the slot so readers only wait for the copy itself
+        fields = (
+            _float(market_data.get("price")),
+            _float(market_data.get("bid")),
+            _float(market_data.get("ask")),
+            _float(market_data.get("change")),
+            _float(market_data.get("change_percent")),
+            int(market_data.get("volume") or 0),
+            _timestamp_ns(market_data["timestamp"]),
+        )
+        view = self._view
+        seq = int(view.seq[slot])
+        view.seq[slot] = seq + 1
+        view.quotes[slot] = fields
+        view.seq[slot] = seq + 2
+
+        head = int(view.header["head"])
+        view.ring[head % self.ring_capacity] = (head + 1, slot, 0)
+        view.header["head"] = head + 1
+
+    def write_batch(self, updates: List[Dict[str, Any]]):
+        for market_data in updates:
+            self.write(market_data)
+
+    def close(self):
+        self._view.header["state"] = STATE_CLOSED
+        del self._view
+        self._mmap.close()
+        self._file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "symbols": len(self._slots),
+            "slot_count": self.slot_count,
+            "updates": int(self._view.header["head"]),
+            "overflow": self.overflow,
+        }
+
+def _mark_closed(path: str):
+    """Flag an existing ring file as closed so its readers reattach to the replacement"""
+    try:
+        with open(path, "r+b") as f:
+            with mmap.mmap(f.fileno(), HEADER_DTYPE.itemsize) as buffer:
+                header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buffer)
+                if header["magic"] == MAGIC:
+                    header["state"] = STATE_CLOSED
+                del header
+    except (OSError, ValueError):
+        pass
+
+class QuoteRingReader:
+    """Lock-free reader of a quote ring file written by the market data service
+
+        reader = QuoteRingReader("/dev/shm/casa_quotes")
+        quote = reader.get("AAPL")
+        cursor, slots = reader.updates_since(0)
+    """
+
+    def __init__(self, path: str, timeout: float = 0.01):
+        self.path = path
+        self.timeout = timeout
+        self._mmap: Optional[mmap.mmap] = None
+        self._attach()
+
+    def _attach(self):
+        # Slot numbers belong to one file; a replacement assigns them afresh
+        self._slots: Dict[str, int] = {}
+        self._known_symbols = 0
+        # Cursors from a replaced file don't apply to the new one
+        self._cursor_stale = self._mmap is not None
+        if self._mmap is not None:
+            # The views must go before the mapping can be closed
+            del self._view
+            self._mmap.close()
+            self._mmap = None
+
+        with open(self.path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buffer)
+        if header["magic"] != MAGIC or int(header["version"]) != LAYOUT_VERSION:
+            del header
+            buffer.close()
+            raise ValueError(f"{self.path} is not a version {LAYOUT_VERSION} quote ring")
+        self.slot_count = int(header["slot_count"])
+        self.ring_capacity = int(header["ring_capacity"])
+        self.generation = int(header["generation"])
+        del header
+        self._mmap = buffer
+        self._view = _Mapping(buffer, self.slot_count, self.ring_capacity)
+
+    def _check_live(self):
+        """Reattach if the writer replaced the file"""
+        if int(self._view.header["state"]) != STATE_CLOSED:
+            return
+        # A writer that shut down without a replacement leaves the same file in place
+        try:
+            with open(self.path, "rb") as f:
+                header = np.frombuffer(f.read(HEADER_DTYPE.itemsize), dtype=HEADER_DTYPE)[0]
+        except (OSError, IndexError):
+            return
+        if int(header["generation"]) != self.generation:
+            self._attach()
+
+    def _refresh_symbols(self):
+        used = int(self._view.header["symbols_used"])
+        for slot in range(self._known_symbols, used):
+            self._slots[self._view.symbols[slot].decode("ascii")] = slot
+        self._known_symbols = used
+
+    def slot(self, symbol: str) -> Optional[int]:
+        self._check_live()
+        slot = self._slots.get(symbol)
+        if slot is None:
+            self._refresh_symbols()
+            slot = self._slots.get(symbol)
+        return slot
+
+    @property
+    def symbols(self) -> List[str]:
+        self._check_live()
+        self._refresh_symbols()
+        return list(self._slots)
+
+    def read_slot(self, slot: int) -> Optional[Tuple]:
+        """Consistent copy of a slot's fields, or None if it was never written"""
+        seq, quotes = self._view.seq, self._view.quotes
+        deadline = None
+        while True:
+            before = int(seq[slot])
+            if not before & 1:
+                fields = quotes[slot].item()
+                if int(seq[slot]) == before:
+                    return fields if before else None
+            # Contended: let the writer finish instead of spinning against it
+            if deadline is None:
+                deadline = time.monotonic() + self.timeout
+            elif time.monotonic() > deadline:
+                raise TimeoutError(f"Quote slot {slot} stayed busy")
+            os.sched_yield()
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        slot = self.slot(symbol)
+        if slot is None:
+            return None
+        fields = self.read_slot(slot)
+        if fields is None:
+            return None
+        quote = dict(zip(QUOTE_DTYPE.names, fields))
+        quote["symbol"] = symbol
+        return quote
+
+    def price(self, symbol: str) -> Optional[float]:
+        quote = self.get(symbol)
+        return quote["price"] if quote else None
+
+    def updates_since(self, cursor: int) -> Tuple[int, Optional[List[int]]]:
+        """Slots written after `cursor`; None means the reader fell behind the ring and should rescan"""
+        self._check_live()
+        head = int(self._view.header["head"])
+        if self._cursor_stale or head - cursor > self.ring_capacity:
+            self._cursor_stale = False
+            return head, None
+        ring = self._view.ring
+        slots = []
+        for update in range(cursor, head):
+            entry = ring[update % self.ring_capacity]
+            if int(entry["update"]) != update + 1:
+                # Overwritten while we were reading
+                return int(self._view.header["head"]), None
+            slots.append(int(entry["slot"]))
+        return head, list(dict.fromkeys(slots))
+
+    def close(self):
+        if self._mmap is not None:
+            del self._view
+            self._mmap.close()
+            self._mmap = None
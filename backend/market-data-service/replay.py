@@ -0,0 +1,192 @@
+"""
+Market Data Service Replay - Casa de Valores Information System
+Recorded tick sources replayed in timestamp batches at 1x, Nx or maximum speed
+"""
+
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Batch = Tuple[datetime, List[Dict[str, Any]]]
+
+def to_market_data(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a stored tick or an exported OHLCV row to the live tick shape"""
+    price = float(record["price"] if record.get("price") not in (None, "") else record["close"])
+    timestamp = record["timestamp"]
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).replace(tzinfo=None)
+
+    def optional(field):
+        value = record.get(field)
+        return None if value in (None, "") else float(value)
+
+    return {
+        "symbol": str(record["symbol"]).upper().strip(),
+        "price": price,
+        "volume": int(float(record.get("volume") or 0)),
+        "change": optional("change") or 0.0,
+        "change_percent": optional("change_percent") or 0.0,
+        "timestamp": timestamp,
+        "bid": optional("bid"),
+        "ask": optional("ask"),
+        "high": optional("high"),
+        "low": optional("low"),
+        "open": optional("open"),
+    }
+
+def _read_file(path: str) -> Iterator[Dict[str, Any]]:
+    """Rows from an NDJSON or CSV file, optionally gzip-compressed (e.g. a historical-data export)"""
+    opener = gzip.open if path.endswith(".gz") else open
+    name = path[:-3] if path.endswith(".gz") else path
+    with opener(path, "rt", newline="") as f:
+        if name.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+async def _batched(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Batch]:
+    """Group consecutive ticks sharing a timestamp, as the live updater emits them"""
+    batch: List[Dict[str, Any]] = []
+    batch_time = None
+    async for record in records:
+        market_data = to_market_data(record)
+        if batch and market_data["timestamp"] != batch_time:
+            yield batch_time, batch
+            batch = []
+        batch_time = market_data["timestamp"]
+        batch.append(market_data)
+    if batch:
+        yield batch_time, batch
+
+async def historical_source(
+    collection,
+    symbols: Optional[List[str]],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    batch_size: int = 5000,
+) -> AsyncIterator[Batch]:
+    query: Dict[str, Any] = {}
+    if symbols:
+        query["symbol"] = {"$in": symbols}
+    if start_date or end_date:
+        query["timestamp"] = {}
+        if start_date:
+            query["timestamp"]["$gte"] = start_date
+        if end_date:
+            query["timestamp"]["$lte"] = end_date
+
+    cursor = collection.find(query, {"_id": 0}).sort("timestamp", 1).batch_size(batch_size)
+    async for batch in _batched(cursor):
+        yield batch
+
+async def file_source(path: str, symbols: Optional[List[str]] = None) -> AsyncIterator[Batch]:
+    wanted = set(symbols) if symbols else None
+
+    async def records():
+        for count, record in enumerate(_read_file(path), 1):
+            if wanted is None or str(record.get("symbol", "")).upper() in wanted:
+                yield record
+            if count % 1000 == 0:
+                await asyncio.sleep(0)  # File reads are synchronous; keep the loop responsive
+
+    async for batch in _batched(records()):
+        yield batch
+
+class ReplaySession:
+    """Drives recorded batches into a publish callback with the original spacing scaled by `speed`
+
+    speed 1 keeps recorded time, N plays N times faster and 0 publishes as
+    fast as the callback accepts batches.
+    """
+
+    def __init__(self, source: AsyncIterator[Batch], publish: Callable[[datetime, List[Dict[str, Any]]], Awaitable[None]],
+                 speed: float = 1.0, description: str = ""):
+        self.source = source
+        self.publish = publish
+        self.speed = speed
+        self.description = description
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.batches = 0
+        self.ticks = 0
+        self.position: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self.started_at = datetime.utcnow()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        wall_start = recorded_start = None
+        try:
+            async for tick_time, updates in self.source:
+                if self.speed > 0:
+                    if recorded_start is None:
+                        wall_start, recorded_start = time.monotonic(), tick_time
+                    # Sleep against the anchor rather than per gap, so publish time doesn't accumulate drift
+                    due = wall_start + (tick_time - recorded_start).total_seconds() / self.speed
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                else:
+                    await asyncio.sleep(0)
+
+                await self.publish(tick_time, updates)
+                self.batches += 1
+                self.ticks += len(updates)
+                self.position = tick_time
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Error in market data replay: {e}")
+        finally:
+            self.finished_at = datetime.utcnow()
+
+    def status(self) -> Dict[str, Any]:
+        elapsed = ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds() if self.started_at else 0.0
+        return {
+            "running": self.running,
+            "source": self.description,
+            "speed": self.speed,
+            "batches_published": self.batches,
+            "ticks_published": self.ticks,
+            "position": self.position,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "ticks_per_second": round(self.ticks / elapsed, 2) if elapsed > 0 else 0.0,
+            "error": self.error,
+        }
+
+def resolve_replay_path(root: str, filename: str) -> str:
+    """Keep file replays inside the configured replay directory"""
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, filename))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError("Replay file must be inside the replay data directory")
+    if not os.path.isfile(path):
+        raise ValueError(f"Replay file not found: {filename}")
+    return path
@@ -0,0 +1,175 @@
+"""
+Market Data Service Scanner - Casa de Valores Information System
+Columnar snapshot of the live quote universe with vectorized screening
+"""
+
+import math
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Columns that criteria can filter and sort on
+SCAN_COLUMNS = ("price", "volume", "change", "change_percent", "rsi", "ema", "volume_ratio")
+
+class MarketScanner:
+    """Latest quote and incremental indicator state per symbol, one NumPy column per field"""
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        rsi_period: int = 14,
+        ema_period: int = 20,
+        volume_period: int = 20,
+        unusual_volume_ratio: float = 2.0,
+    ):
+        self.rsi_period = rsi_period
+        self.ema_period = ema_period
+        self.volume_period = volume_period
+        self.unusual_volume_ratio = unusual_volume_ratio
+        self.symbols: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        # Private indicator state, same row layout as the public columns
+        self._state: Dict[str, np.ndarray] = {}
+        self._allocate(capacity)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _allocate(self, capacity: int):
+        count = len(self.symbols)
+        for group, names in (
+            (self._columns, SCAN_COLUMNS),
+            (self._state, ("prev_price", "avg_gain", "avg_loss", "avg_volume", "ticks")),
+        ):
+            for name in names:
+                column = np.full(capacity, np.nan)
+                if name in group:
+                    column[:count] = group[name][:count]
+                group[name] = column
+
+    def _row(self, symbol: str) -> int:
+        row = self._rows.get(symbol)
+        if row is None:
+            row = len(self.symbols)
+            if row == len(self._columns["price"]):
+                self._allocate(row * 2)
+            self.symbols.append(symbol)
+            self._rows[symbol] = row
+            self._state["ticks"][row] = 0
+        return row
+
+    def update(self, market_data: Dict[str, Any]):
+        """Apply one quote, advancing RSI, EMA and volume baselines in O(1)"""
+        row = self._row(market_data["symbol"])
+        columns, state = self._columns, self._state
+        price = float(market_data["price"])
+        volume = float(market_data.get("volume") or 0)
+        ticks = int(state["ticks"][row]) + 1
+        state["ticks"][row] = ticks
+
+        # RSI with Wilder smoothing, seeded by a simple average of the first deltas
+        prev_price = state["prev_price"][row]
+        if not math.isnan(prev_price):
+            delta = price - prev_price
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            deltas = ticks - 1
+            period = self.rsi_period
+            if deltas <= period:
+                state["avg_gain"][row] = ((0.0 if deltas == 1 else state["avg_gain"][row]) * (deltas - 1) + gain) / deltas
+                state["avg_loss"][row] = ((0.0 if deltas == 1 else state["avg_loss"][row]) * (deltas - 1) + loss) / deltas
+            else:
+                state["avg_gain"][row] = (state["avg_gain"][row] * (period - 1) + gain) / period
+                state["avg_loss"][row] = (state["avg_loss"][row] * (period - 1) + loss) / period
+            if deltas >= period:
+                avg_loss = state["avg_loss"][row]
+                columns["rsi"][row] = 100.0 if avg_loss == 0 else 100 - 100 / (1 + state["avg_gain"][row] / avg_loss)
+        state["prev_price"][row] = price
+
+        # EMA seeded with the running mean of the first period prices
+        ema = columns["ema"][row]
+        if ticks <= self.ema_period:
+            columns["ema"][row] = price if ticks == 1 else ema + (price - ema) / ticks
+        else:
+            multiplier = 2 / (self.ema_period + 1)
+            columns["ema"][row] = price * multiplier + ema * (1 - multiplier)
+
+        # Volume ratio against the baseline before this tick is folded in
+        avg_volume = state["avg_volume"][row]
+        if math.isnan(avg_volume):
+            state["avg_volume"][row] = volume
+        else:
+            if ticks > self.volume_period // 2 and avg_volume > 0:
+                columns["volume_ratio"][row] = volume / avg_volume
+            multiplier = 2 / (self.volume_period + 1)
+            state["avg_volume"][row] = volume * multiplier + avg_volume * (1 - multiplier)
+
+        columns["price"][row] = price
+        columns["volume"][row] = volume
+        columns["change"][row] = market_data.get("change", np.nan)
+        columns["change_percent"][row] = market_data.get("change_percent", np.nan)
+
+    def set_volume_ratio(self, symbol: str, ratio: float):
+        """Override the volume ratio with an externally maintained baseline"""
+        self._columns["volume_ratio"][self._row(symbol)] = ratio
+
+    def scan(self, criteria: Dict[str, Any], limit: int = 50) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return (total matches, top `limit` rows) for the given criteria
+
+        criteria maps a column to {"min": x, "max": y}; "unusual_volume": true
+        keeps rows whose volume_ratio reaches the unusual threshold; "symbols"
+        restricts the universe; "sort_by"/"sort_order" pick the ranking.
+        """
+        count = len(self.symbols)
+        columns = {name: values[:count] for name, values in self._columns.items()}
+        mask = ~np.isnan(columns["price"])
+
+        for name, bounds in criteria.items():
+            if name in ("sort_by", "sort_order", "symbols", "unusual_volume"):
+                continue
+            if name not in SCAN_COLUMNS:
+                raise ValueError(f"Unknown scanner criterion: {name}")
+            if not isinstance(bounds, dict):
+                raise ValueError(f"Criterion {name} must be an object with min and/or max")
+            # NaN compares False, so symbols without the indicator yet never match
+            if bounds.get("min") is not None:
+                mask &= columns[name] >= float(bounds["min"])
+            if bounds.get("max") is not None:
+                mask &= columns[name] <= float(bounds["max"])
+
+        if criteria.get("unusual_volume"):
+            mask &= columns["volume_ratio"] >= self.unusual_volume_ratio
+
+        if criteria.get("symbols"):
+            wanted = np.zeros(count, dtype=bool)
+            for symbol in criteria["symbols"]:
+                row = self._rows.get(symbol.upper().strip())
+                if row is not None:
+                    wanted[row] = True
+            mask &= wanted
+
+        sort_by = criteria.get("sort_by", "change_percent")
+        if sort_by not in SCAN_COLUMNS:
+            raise ValueError(f"Unknown sort column: {sort_by}")
+        descending = criteria.get("sort_order", "desc") != "asc"
+
+        matches = np.flatnonzero(mask)
+        keys = columns[sort_by][matches]
+        keys = np.where(np.isnan(keys), -np.inf if descending else np.inf, keys)
+        if descending:
+            keys = -keys
+
+        # Partial selection first so only `limit` rows are fully sorted
+        if len(matches) > limit:
+            top = np.argpartition(keys, limit - 1)[:limit]
+            matches, keys = matches[top], keys[top]
+        matches = matches[np.argsort(keys, kind="stable")]
+
+        results = []
+        for row in matches.tolist():
+            result = {"symbol": self.symbols[row]}
+            for name in SCAN_COLUMNS:
+                value = float(columns[name][row])
+                result[name] = None if math.isnan(value) else value
+            results.append(result)
+        return int(mask.sum()), results
@@ -21,6 +21,22 @@ class AlertCondition(str, Enum):
     BELOW = "below"
     EQUALS = "equals"
 
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class DownsampleMethod(str, Enum):
+    OHLC = "ohlc"
+    LTTB = "lttb"
+
+class ReplaySourceType(str, Enum):
+    HISTORICAL = "historical"
+    FILE = "file"
+
+class SubscriptionAction(str, Enum):
+    SUBSCRIBE = "subscribe"
+    UNSUBSCRIBE = "unsubscribe"
+
 class MarketDataResponse(BaseModel):
     """Market data response schema"""
     symbol: str
@@ -46,6 +62,33 @@ class HistoricalDataRequest(BaseModel):
     end_date: datetime
     interval: Optional[str] = "1d"  # 1m, 5m, 15m, 30m, 1h, 1d
     limit: Optional[int] = 1000
+    max_points: Optional[int] = None  # Downsample the whole range to at most this many rows
+    downsample: DownsampleMethod = DownsampleMethod.OHLC
+    
+    @validator('symbol')
+    def validate_symbol(cls, v):
+        return v.upper().strip()
+    
+    @validator('end_date')
+    def validate_date_range(cls, v, values):
+        if 'start_date' in values and v <= values['start_date']:
+            raise ValueError('end_date must be after start_date')
+        return v
+    
+    @validator('downsample', always=True)
+    def validate_max_points(cls, v, values):
+        max_points = values.get('max_points')
+        if max_points is not None and max_points < (3 if v == DownsampleMethod.LTTB else 1):
+            raise ValueError('max_points is too small for the downsampling method')
+        return v
+
+class HistoricalDataExportRequest(BaseModel):
+    """Streaming historical data export request schema"""
+    symbol: str
+    start_date: datetime
+    end_date: datetime
+    format: ExportFormat = ExportFormat.NDJSON
+    compress: bool = False
     
     @validator('symbol')
     def validate_symbol(cls, v):
@@ -67,6 +110,7 @@ class HistoricalDataResponse(BaseModel):
     close: float
     volume: int
     adjusted_close: Optional[float] = None
+    adjusted_volume: Optional[int] = None  # Split-adjusted, on the same share basis as adjusted_close
 
 class TechnicalIndicatorRequest(BaseModel):
     """Technical indicator request schema"""
@@ -136,6 +180,104 @@ class SubscriptionRequest(BaseModel):
             raise ValueError('Maximum 50 symbols allowed per subscription')
         return v
 
+class WebSocketSubscriptionMessage(BaseModel):
+    """Client message on the multiplexed market data WebSocket"""
+    action: SubscriptionAction
+    symbols: List[str]
+    
+    @validator('symbols')
+    def validate_symbols(cls, v):
+        return [symbol.upper().strip() for symbol in v if symbol.strip()]
+
+class CorporateActionRequest(BaseModel):
+    """Corporate action request schema"""
+    symbol: str
+    action_type: str  # dividend, split, merger, spinoff
+    ex_date: datetime
+    announcement_date: Optional[datetime] = None
+    record_date: Optional[datetime] = None
+    payment_date: Optional[datetime] = None
+    details: Dict[str, Any] = {}  # split: ratio; dividend: amount, optional reference_price
+    
+    @validator('symbol')
+    def validate_symbol(cls, v):
+        return v.upper().strip()
+    
+    @validator('action_type')
+    def validate_action_type(cls, v):
+        if v not in ('dividend', 'split', 'merger', 'spinoff'):
+            raise ValueError('action_type must be dividend, split, merger or spinoff')
+        return v
+    
+    @validator('details', always=True)
+    def validate_details(cls, v, values):
+        action_type = values.get('action_type')
+        if action_type == 'split' and not (isinstance(v.get('ratio'), (int, float)) and v['ratio'] > 0):
+            raise ValueError('split details require a positive ratio')
+        if action_type == 'dividend' and not (isinstance(v.get('amount'), (int, float)) and v['amount'] > 0):
+            raise ValueError('dividend details require a positive amount')
+        return v
+
+class CorporateActionResponse(BaseModel):
+    """Corporate action response schema"""
+    id: str
+    symbol: str
+    action_type: str
+    ex_date: datetime
+    announcement_date: datetime
+    record_date: Optional[datetime] = None
+    payment_date: Optional[datetime] = None
+    details: Dict[str, Any]
+    adjustment_factor: float
+
+class MarketIndexRequest(BaseModel):
+    """Market index definition request schema"""
+    symbol: str
+    name: str
+    constituents: List[str]
+    weighting: str = "price"  # price or cap
+    shares: Optional[Dict[str, float]] = None  # shares outstanding per constituent, for cap weighting
+    base_value: float = 1000.0
+    divisor: Optional[float] = None
+    
+    @validator('symbol')
+    def validate_symbol(cls, v):
+        return v.upper().strip()
+    
+    @validator('constituents')
+    def validate_constituents(cls, v):
+        v = list(dict.fromkeys(symbol.upper().strip() for symbol in v))
+        if not v:
+            raise ValueError('constituents must not be empty')
+        return v
+    
+    @validator('weighting')
+    def validate_weighting(cls, v):
+        if v not in ('price', 'cap'):
+            raise ValueError('weighting must be price or cap')
+        return v
+    
+    @validator('shares', always=True)
+    def validate_shares(cls, v, values):
+        if values.get('weighting') == 'cap':
+            if not v:
+                raise ValueError('cap-weighted indices require shares per constituent')
+            v = {symbol.upper().strip(): shares for symbol, shares in v.items()}
+            missing = [symbol for symbol in values.get('constituents', []) if v.get(symbol, 0) <= 0]
+            if missing:
+                raise ValueError(f"missing shares for {', '.join(missing)}")
+        return v
+
+class MarketIndexResponse(BaseModel):
+    """Market index response schema"""
+    symbol: str
+    name: str
+    value: Optional[float] = None
+    change: float
+    change_percent: float
+    constituents: List[str]
+    timestamp: datetime
+
 class MarketOverviewResponse(BaseModel):
     """Market overview response schema"""
     timestamp: str
@@ -189,6 +331,14 @@ class MarketCalendarResponse(BaseModel):
     early_close: Optional[datetime] = None
     holiday_name: Optional[str] = None
 
+class MarketStatusResponse(BaseModel):
+    """Market session status response schema"""
+    market: str
+    session: str  # pre_market, regular, after_hours or closed
+    is_open: bool
+    next_open: datetime
+    timestamp: datetime
+
 class WatchlistRequest(BaseModel):
     """Watchlist request schema"""
     user_id: str
@@ -216,6 +366,16 @@ class WatchlistResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+class WatchlistQuotesResponse(BaseModel):
+    """Latest quotes for every symbol of a watchlist"""
+    watchlist_id: Optional[str] = None
+    name: str
+    symbols: List[str]
+    quotes: List[MarketDataResponse]
+    missing: List[str] = []  # Symbols with no cached quote
+    stream_url: Optional[str] = None  # Multiplexed WebSocket pre-subscribed to the same symbols, if they fit one connection
+    timestamp: datetime
+
 class MarketScannerRequest(BaseModel):
     """Market scanner request schema"""
     criteria: Dict[str, Any]
@@ -243,6 +403,46 @@ class VolumeAnalysisResponse(BaseModel):
     unusual_volume: bool
     timestamp: datetime
 
+class ReplayRequest(BaseModel):
+    """Tick replay request schema"""
+    source: ReplaySourceType = ReplaySourceType.HISTORICAL
+    symbols: Optional[List[str]] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    file_path: Optional[str] = None  # relative to the replay data directory
+    speed: float = 1.0  # 1 = recorded pace, N = N times faster, 0 = as fast as possible
+    
+    @validator('symbols')
+    def validate_symbols(cls, v):
+        if v is not None:
+            return [symbol.upper().strip() for symbol in v]
+        return v
+    
+    @validator('file_path', always=True)
+    def validate_file_path(cls, v, values):
+        if values.get('source') == ReplaySourceType.FILE and not v:
+            raise ValueError('file_path is required for file replays')
+        return v
+    
+    @validator('speed')
+    def validate_speed(cls, v):
+        if v < 0:
+            raise ValueError('speed must be non-negative')
+        return v
+
+class ReplayStatusResponse(BaseModel):
+    """Tick replay status response schema"""
+    running: bool
+    source: str
+    speed: float
+    batches_published: int
+    ticks_published: int
+    position: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    ticks_per_second: float
+    error: Optional[str] = None
+
 class PriceAlertWebSocketMessage(BaseModel):
     """WebSocket message for price alerts"""
     type: str = "price_alert"
@@ -0,0 +1,166 @@
+"""
+Market Data Service Sharding - Casa de Valores Information System
+Consistent-hash partitioning of the symbol universe with Redis lease ownership
+"""
+
+import bisect
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Only the holder may extend or drop a lease
+RENEW_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+class HashRing:
+    """Consistent hash ring; each member owns `virtual_nodes` points to even out the split"""
+
+    def __init__(self, virtual_nodes: int = 128):
+        self.virtual_nodes = virtual_nodes
+        self.members: List[str] = []
+        self._points: List[int] = []
+        self._owners: List[str] = []
+
+    def rebuild(self, members: Iterable[str]):
+        self.members = sorted(set(members))
+        points = sorted(
+            (_hash(f"{member}#{node}"), member)
+            for member in self.members
+            for node in range(self.virtual_nodes)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [member for _, member in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+class ShardCoordinator:
+    """Decides which symbols this replica produces ticks for
+
+    Live replicas register in a Redis sorted set scored by expiry time and
+    the ring is rebuilt from it, so a symbol moves only when the membership
+    around it changes. Ring placement is not enough on its own while
+    replicas disagree about membership, so every owned symbol is also
+    backed by a lease key (SET NX PX). A symbol is produced only while its
+    lease is held, which keeps each tick produced exactly once across
+    replicas; if Redis becomes unreachable the replica stops producing
+    once its leases would have expired.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        replica_id: str,
+        symbols: Iterable[str],
+        lease_ttl: float = 10.0,
+        virtual_nodes: int = 128,
+        prefix: str = "market_data:shard",
+    ):
+        self.redis = redis_client
+        self.replica_id = replica_id
+        self.symbols = sorted(set(symbols))
+        self.lease_ttl = lease_ttl
+        self.prefix = prefix
+        self.ring = HashRing(virtual_nodes)
+        self._owned: Set[str] = set()
+        self._valid_until = 0.0
+        self._renew = redis_client.register_script(RENEW_LEASE_SCRIPT)
+        self._release = redis_client.register_script(RELEASE_LEASE_SCRIPT)
+
+    @property
+    def members_key(self) -> str:
+        return f"{self.prefix}:replicas"
+
+    def lease_key(self, symbol: str) -> str:
+        return f"{self.prefix}:lease:{symbol}"
+
+    @property
+    def owned(self) -> Set[str]:
+        """Symbols whose lease is known to still be held"""
+        if time.monotonic() >= self._valid_until:
+            return set()
+        return self._owned
+
+    def owns(self, symbol: str) -> bool:
+        return symbol in self.owned
+
+    def assigned(self, key: str) -> bool:
+        """Ring placement only, for derived data every replica computes but one should write"""
+        return self.ring.owner(key) == self.replica_id
+
+    async def refresh(self):
+        """Heartbeat membership, then renew, release and acquire leases in one pipeline each"""
+        started = time.monotonic()
+        now = time.time()
+        ttl_ms = int(self.lease_ttl * 1000)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.members_key, {self.replica_id: now + self.lease_ttl})
+            pipe.zremrangebyscore(self.members_key, "-inf", now)
+            pipe.zrange(self.members_key, 0, -1)
+            _, _, members = await pipe.execute()
+
+        if members != self.ring.members:
+            self.ring.rebuild(members)
+            logger.info(f"Shard ring rebuilt with {len(self.ring.members)} replicas")
+
+        desired = {symbol for symbol in self.symbols if self.ring.owner(symbol) == self.replica_id}
+        held = sorted(self._owned & desired)
+        released = sorted(self._owned - desired)
+        wanted = sorted(desired - self._owned)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for symbol in held:
+                await self._renew(keys=[self.lease_key(symbol)], args=[self.replica_id, ttl_ms], client=pipe)
+            for symbol in released:
+                await self._release(keys=[self.lease_key(symbol)], args=[self.replica_id], client=pipe)
+            for symbol in wanted:
+                pipe.set(self.lease_key(symbol), self.replica_id, nx=True, px=ttl_ms)
+            results = await pipe.execute()
+
+        renewed = {symbol for symbol, ok in zip(held, results) if ok}
+        acquired = {symbol for symbol, ok in zip(wanted, results[len(held) + len(released):]) if ok}
+        if len(renewed) < len(held):
+            logger.warning(f"Lost {len(held) - len(renewed)} symbol leases")
+
+        self._owned = renewed | acquired
+        # Leases were set after `started`, so they outlive this deadline
+        self._valid_until = started + self.lease_ttl
+
+    async def release(self):
+        """Hand symbols back immediately on shutdown instead of waiting for expiry"""
+        owned, self._owned = sorted(self._owned), set()
+        self._valid_until = 0.0
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrem(self.members_key, self.replica_id)
+            for symbol in owned:
+                await self._release(keys=[self.lease_key(symbol)], args=[self.replica_id], client=pipe)
+            await pipe.execute()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replica_id": self.replica_id,
+            "replicas": len(self.ring.members),
+            "universe": len(self.symbols),
+            "owned_symbols": len(self.owned),
+        }
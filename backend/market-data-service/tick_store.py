@@ -0,0 +1,213 @@
+"""
+Market Data Service Tick Store - Casa de Valores Information System
+Columnar on-disk tick storage with memory-mapped reads
+"""
+
+import os
+import asyncio
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# On-disk layout: <root>/<SYMBOL>/<YYYY-MM-DD>/<column>.bin, one raw
+# little-endian array per column so readers can memory map each one.
+TICK_COLUMNS: Dict[str, np.dtype] = {
+    "timestamp": np.dtype("<i8"),  # epoch nanoseconds, UTC
+    "price": np.dtype("<f8"),
+    "volume": np.dtype("<i8"),
+}
+
+def to_epoch_ns(value: datetime) -> int:
+    """Convert a datetime (naive values are treated as UTC) to epoch nanoseconds"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return int(np.datetime64(value, "ns").astype(np.int64))
+
+class TickSlice:
+    """Columnar view of the ticks for one symbol over a time range"""
+
+    def __init__(self, symbol: str, timestamps: np.ndarray, prices: np.ndarray, volumes: np.ndarray):
+        self.symbol = symbol
+        self.timestamps = timestamps
+        self.prices = prices
+        self.volumes = volumes
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def datetimes(self) -> np.ndarray:
+        """Timestamps as datetime64[ns] (a view, no copy)"""
+        return self.timestamps.view("datetime64[ns]")
+
+    @classmethod
+    def empty(cls, symbol: str) -> "TickSlice":
+        return cls(
+            symbol,
+            np.empty(0, dtype=TICK_COLUMNS["timestamp"]),
+            np.empty(0, dtype=TICK_COLUMNS["price"]),
+            np.empty(0, dtype=TICK_COLUMNS["volume"]),
+        )
+
+class TickStore:
+    """Per-symbol, per-day columnar tick files written in batches and read via mmap"""
+
+    def __init__(self, root: str, max_open_maps: int = 1024, max_open_files: int = 3072):
+        self.root = root
+        self.max_open_maps = max_open_maps
+        self.max_open_files = max_open_files
+        self._buffers: Dict[Tuple[str, date], Dict[str, List]] = {}
+        # path -> (file size when mapped, memmap); LRU bounded
+        self._maps: "OrderedDict[str, Tuple[int, np.ndarray]]" = OrderedDict()
+        # path -> unbuffered append handle, LRU bounded; only touched by the writer thread
+        self._files: "OrderedDict[str, Any]" = OrderedDict()
+        # A single writer thread keeps flushes ordered and file I/O off the event loop
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tick-store")
+
+    def _day_dir(self, symbol: str, day: date) -> str:
+        return os.path.join(self.root, symbol.upper(), day.isoformat())
+
+    def append(self, symbol: str, timestamp: datetime, price: float, volume: int):
+        """Buffer a tick; it becomes visible to readers after flush()"""
+        day = (timestamp.astimezone(timezone.utc) if timestamp.tzinfo else timestamp).date()
+        buffer = self._buffers.get((symbol, day))
+        if buffer is None:
+            buffer = {column: [] for column in TICK_COLUMNS}
+            self._buffers[(symbol, day)] = buffer
+        buffer["timestamp"].append(to_epoch_ns(timestamp))
+        buffer["price"].append(price)
+        buffer["volume"].append(volume)
+
+    def _file(self, path: str):
+        f = self._files.get(path)
+        if f is None:
+            f = open(path, "ab", buffering=0)
+            self._files[path] = f
+            while len(self._files) > self.max_open_files:
+                self._files.popitem(last=False)[1].close()
+        else:
+            self._files.move_to_end(path)
+        return f
+
+    def _write(self, buffers: Dict[Tuple[str, date], Dict[str, List]]):
+        for (symbol, day), columns in buffers.items():
+            day_dir = self._day_dir(symbol, day)
+            try:
+                paths = [os.path.join(day_dir, f"{column}.bin") for column in TICK_COLUMNS]
+                if paths[0] not in self._files:
+                    os.makedirs(day_dir, exist_ok=True)
+                for path, (column, dtype) in zip(paths, TICK_COLUMNS.items()):
+                    self._file(path).write(np.asarray(columns[column], dtype=dtype).tobytes())
+            except OSError as e:
+                logger.error(f"Error writing ticks for {symbol} on {day}: {e}")
+
+    def flush(self):
+        """Append buffered ticks to their column files, blocking until written"""
+        buffers, self._buffers = self._buffers, {}
+        self._writer.submit(self._write, buffers).result()
+
+    async def flush_async(self):
+        """flush() on the writer thread; the event loop keeps serving meanwhile"""
+        buffers, self._buffers = self._buffers, {}
+        if buffers:
+            await asyncio.get_running_loop().run_in_executor(self._writer, self._write, buffers)
+
+    def close(self):
+        self.flush()
+
+        def close_files():
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+
+        self._writer.submit(close_files).result()
+
+    def _column(self, symbol: str, day: date, column: str) -> Optional[np.ndarray]:
+        path = os.path.join(self._day_dir(symbol, day), f"{column}.bin")
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+
+        cached = self._maps.get(path)
+        if cached and cached[0] == size:
+            self._maps.move_to_end(path)
+            return cached[1]
+
+        dtype = TICK_COLUMNS[column]
+        count = size // dtype.itemsize
+        if count == 0:
+            return None
+
+        # Files still being appended to are remapped when their size changes
+        mapped = np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+        self._maps[path] = (size, mapped)
+        self._maps.move_to_end(path)
+        while len(self._maps) > self.max_open_maps:
+            self._maps.popitem(last=False)
+        return mapped
+
+    def days(self, symbol: str, start: datetime, end: datetime) -> List[date]:
+        """Days with stored ticks for a symbol between start and end (inclusive)"""
+        symbol_dir = os.path.join(self.root, symbol.upper())
+        if not os.path.isdir(symbol_dir):
+            return []
+
+        first = (start.astimezone(timezone.utc) if start.tzinfo else start).date()
+        last = (end.astimezone(timezone.utc) if end.tzinfo else end).date()
+        stored = []
+        for name in os.listdir(symbol_dir):
+            try:
+                day = date.fromisoformat(name)
+            except ValueError:
+                continue
+            if first <= day <= last:
+                stored.append(day)
+        return sorted(stored)
+
+    def iter_day_slices(self, symbol: str, start: datetime, end: datetime) -> Iterator[TickSlice]:
+        """Yield zero-copy per-day slices covering [start, end]"""
+        symbol = symbol.upper()
+        start_ns = to_epoch_ns(start)
+        end_ns = to_epoch_ns(end)
+
+        for day in self.days(symbol, start, end):
+            columns = {column: self._column(symbol, day, column) for column in TICK_COLUMNS}
+            if any(values is None for values in columns.values()):
+                continue
+
+            # A crash mid-flush can leave columns of different lengths
+            count = min(len(values) for values in columns.values())
+            timestamps = columns["timestamp"][:count]
+            lo = int(np.searchsorted(timestamps, start_ns, side="left"))
+            hi = int(np.searchsorted(timestamps, end_ns, side="right"))
+            if lo >= hi:
+                continue
+
+            yield TickSlice(
+                symbol,
+                timestamps[lo:hi],
+                columns["price"][lo:hi],
+                columns["volume"][lo:hi],
+            )
+
+    def read_range(self, symbol: str, start: datetime, end: datetime) -> TickSlice:
+        """Ticks for [start, end]; zero-copy when the range falls within one day"""
+        slices = list(self.iter_day_slices(symbol, start, end))
+        if not slices:
+            return TickSlice.empty(symbol.upper())
+        if len(slices) == 1:
+            return slices[0]
+
+        return TickSlice(
+            symbol.upper(),
+            np.concatenate([s.timestamps for s in slices]),
+            np.concatenate([s.prices for s in slices]),
+            np.concatenate([s.volumes for s in slices]),
+        )
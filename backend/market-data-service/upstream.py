@@ -0,0 +1,134 @@
+"""
+Market Data Service Upstream Client - Casa de Valores Information System
+Pooled HTTP client for the external market data provider with request coalescing
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers using the same key"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+
+        # Shield so a cancelled caller does not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+
+def quote_time(data: Dict[str, Any]) -> Optional[datetime]:
+    """Provider quote time as naive UTC, from an ISO `timestamp` or epoch seconds/milliseconds in `t`"""
+    value = data.get("timestamp", data.get("t"))
+    if value is None:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.utcfromtimestamp(value / 1000 if value > 1e11 else value)
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (ValueError, OverflowError, OSError):
+        return None
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+class UpstreamClient:
+    """Long-lived keep-alive session to the quote provider"""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        max_connections: int = 100,
+        max_connections_per_host: int = 10,
+        timeout: float = 10.0,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self.coalesced = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._flights = SingleFlight()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=30,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch_quote(self, symbol: str) -> Optional[Dict]:
+        """Fetch a quote; concurrent requests for the same symbol share one call"""
+        if symbol in self._flights:
+            self.coalesced += 1
+        return await self._flights.do(symbol, lambda: self._fetch_quote(symbol))
+
+    async def _fetch_quote(self, symbol: str) -> Optional[Dict]:
+        session = self._get_session()
+        async with session.get(f"{self.base_url}/quote/{symbol}") as response:
+            if response.status != 200:
+                logger.warning(f"Upstream returned {response.status} for {symbol}")
+                return None
+
+            data = await response.json()
+            # A quote without a price is unusable; 0.0 would pass for a real print
+            if data.get("price") is None:
+                logger.warning(f"Upstream quote for {symbol} has no price")
+                return None
+            # Without the provider's time the staleness check can't tell a delayed quote from a fresh one
+            timestamp = quote_time(data)
+            if timestamp is None:
+                logger.warning(f"Upstream quote for {symbol} has no quote time")
+                return None
+            return {
+                "symbol": symbol,
+                "price": data["price"],
+                "volume": data.get("volume", 0),
+                "change": data.get("change", 0.0),
+                "change_percent": data.get("change_percent", 0.0),
+                "timestamp": timestamp.isoformat()
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "coalesced_requests": self.coalesced,
+            "max_connections_per_host": self.max_connections_per_host,
+        }
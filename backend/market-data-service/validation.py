@@ -0,0 +1,113 @@
+"""
+Market Data Service Tick Validation - Casa de Valores Information System
+Vectorized sanity checks that drop bad ticks from a batch before caching and fan-out
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+REJECT_REASONS = ("invalid_price", "invalid_timestamp", "stale", "crossed", "spike")
+
+class TickValidator:
+    """Checks a whole tick batch with array operations
+
+    A tick is rejected when its price is missing, non-finite or not
+    positive, its timestamp is unparseable or more than `max_age` seconds
+    away from the batch time, its bid is above its ask, or its price is more
+    than `spike_threshold` (a fraction) away from the median of the symbol's
+    last `window` accepted prices. Only accepted prices enter the median, so
+    a bad print can't drag it; a move that persists for `min_history` ticks
+    in a row is taken as a new level and restarts the history.
+    """
+
+    def __init__(self, max_age: float = 5.0, spike_threshold: float = 0.2, window: int = 21, min_history: int = 5):
+        self.max_age = np.timedelta64(int(max_age * 1e6), "us")
+        self.spike_threshold = spike_threshold
+        self.window = window
+        self.min_history = min_history
+        self._rows: Dict[str, int] = {}
+        # Ring of recent accepted prices per symbol, NaN until filled
+        self._history = np.full((0, window), np.nan)
+        self._positions = np.zeros(0, dtype=np.int64)
+        self._spike_runs = np.zeros(0, dtype=np.int64)
+        self.accepted = 0
+        self.rejected = dict.fromkeys(REJECT_REASONS, 0)
+
+    def _row_indices(self, symbols: List[str]) -> np.ndarray:
+        rows = self._rows
+        for symbol in symbols:
+            if symbol not in rows:
+                rows[symbol] = len(rows)
+        if len(rows) > len(self._history):
+            grow = max(len(rows) - len(self._history), len(self._history))
+            self._history = np.vstack([self._history, np.full((grow, self.window), np.nan)])
+            self._positions = np.concatenate([self._positions, np.zeros(grow, dtype=np.int64)])
+            self._spike_runs = np.concatenate([self._spike_runs, np.zeros(grow, dtype=np.int64)])
+        return np.fromiter((rows[symbol] for symbol in symbols), dtype=np.int64, count=len(symbols))
+
+    @staticmethod
+    def _column(updates: List[Dict[str, Any]], field: str) -> np.ndarray:
+        return np.array([update.get(field) for update in updates], dtype=float)
+
+    def validate(self, updates: List[Dict[str, Any]], now: datetime) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str]]]:
+        """Split a batch into accepted ticks and (tick, reason) rejections"""
+        if not updates:
+            return [], []
+
+        rows = self._row_indices([update["symbol"] for update in updates])
+        prices = self._column(updates, "price")
+        bids = self._column(updates, "bid")
+        asks = self._column(updates, "ask")
+        timestamps = pd.to_datetime(
+            [update.get("timestamp") for update in updates], utc=True, errors="coerce", format="ISO8601"
+        ).tz_localize(None).values.astype("datetime64[us]")
+        age = np.abs(np.datetime64(now, "us") - timestamps)
+
+        reasons = np.full(len(updates), "", dtype=object)
+        # Later checks only label ticks that passed the earlier ones
+        checks = [
+            ("invalid_price", ~(np.isfinite(prices) & (prices > 0))),
+            ("invalid_timestamp", np.isnat(timestamps)),
+            ("stale", age > self.max_age),
+            ("crossed", bids > asks),  # False when either side is missing (NaN)
+        ]
+
+        history = self._history[rows]
+        known = np.count_nonzero(~np.isnan(history), axis=1)
+        median = np.full(len(updates), np.nan)
+        has_history = known >= self.min_history
+        if has_history.any():
+            median[has_history] = np.nanmedian(history[has_history], axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            spike = has_history & (np.abs(prices / median - 1) > self.spike_threshold)
+
+        for reason, failed in checks:
+            reasons[failed & (reasons == "")] = reason
+
+        # A level that holds for min_history consecutive ticks is real, not a spike
+        runs = self._spike_runs[rows]
+        runs = np.where(spike & (reasons == ""), runs + 1, 0)
+        new_level = runs >= self.min_history
+        spike &= ~new_level
+        reasons[spike & (reasons == "")] = "spike"
+        self._spike_runs[rows] = np.where(new_level, 0, runs)
+        if new_level.any():
+            self._history[rows[new_level]] = np.nan
+
+        accepted_mask = reasons == ""
+        accepted_rows = rows[accepted_mask]
+        self._history[accepted_rows, self._positions[accepted_rows] % self.window] = prices[accepted_mask]
+        self._positions[accepted_rows] += 1
+
+        accepted = [update for update, ok in zip(updates, accepted_mask.tolist()) if ok]
+        rejected = [(updates[i], reasons[i]) for i in np.flatnonzero(~accepted_mask).tolist()]
+        self.accepted += len(accepted)
+        for _, reason in rejected:
+            self.rejected[reason] += 1
+        return accepted, rejected
+
+    def stats(self) -> Dict[str, Any]:
+        return {"symbols": len(self._rows), "accepted": self.accepted, "rejected": dict(self.rejected)}
@@ -0,0 +1,189 @@
+"""
+Market Data Service Volume Analysis - Casa de Valores Information System
+Rolling time-of-day volume baselines maintained incrementally from ticks
+"""
+
+import logging
+import math
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class VolumeBaselines:
+    """Per-symbol average volume for each intraday bucket, smoothed across days
+
+    Each tick adds to the current bucket's running volume. When a bucket
+    closes its total is folded into that bucket's baseline with an EWMA over
+    `lookback_days`, so requests never scan history. Buckets are time-of-day
+    slots in the exchange's `timezone`, so the open and close keep their
+    buckets across DST changes; when `bucket_minutes` doesn't divide the day
+    the last one is shorter. Timestamps are naive UTC.
+    """
+
+    def __init__(self, bucket_minutes: int = 5, lookback_days: int = 20, unusual_ratio: float = 2.0, capacity: int = 256,
+                 timezone: str = "UTC"):
+        if not 1 <= bucket_minutes <= 1440:
+            raise ValueError("bucket_minutes must be between 1 and 1440")
+        self.timezone = timezone
+        self._zone = ZoneInfo(timezone)
+        # Every tick of a batch shares its timestamp, so the UTC offset is looked up once per batch
+        self._offset_for: Optional[datetime] = None
+        self._offset = timedelta(0)
+        self.bucket_minutes = bucket_minutes
+        self.bucket_seconds = bucket_minutes * 60
+        self.n_buckets = math.ceil(1440 / bucket_minutes)
+        self.alpha = 2 / (lookback_days + 1)
+        self.unusual_ratio = unusual_ratio
+        self.symbols: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self.baseline = np.full((capacity, self.n_buckets), np.nan)
+        # Running state for the bucket currently being filled, per symbol
+        self._slot = np.full(capacity, -1, dtype=np.int64)  # day ordinal * n_buckets + bucket
+        self._volume = np.zeros(capacity)
+        self._last_seen = np.zeros(capacity)  # seconds into the current bucket
+        self._flagged = np.zeros(capacity, dtype=bool)
+
+    def _row(self, symbol: str) -> int:
+        row = self._rows.get(symbol)
+        if row is None:
+            row = len(self.symbols)
+            if row == len(self._slot):
+                self._grow(row * 2)
+            self.symbols.append(symbol)
+            self._rows[symbol] = row
+        return row
+
+    def _grow(self, capacity: int):
+        count = len(self.symbols)
+        baseline = np.full((capacity, self.n_buckets), np.nan)
+        baseline[:count] = self.baseline[:count]
+        self.baseline = baseline
+        for name, fill in (("_slot", -1), ("_volume", 0), ("_last_seen", 0), ("_flagged", False)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:count] = old[:count]
+            setattr(self, name, new)
+
+    def _local(self, timestamp: datetime) -> datetime:
+        if timestamp != self._offset_for:
+            self._offset = self._zone.utcoffset(timestamp.replace(tzinfo=dt_timezone.utc).astimezone(self._zone))
+            self._offset_for = timestamp
+        return timestamp + self._offset
+
+    def _position(self, timestamp: datetime):
+        timestamp = self._local(timestamp)
+        seconds = timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second
+        bucket = seconds // self.bucket_seconds
+        return timestamp.date().toordinal() * self.n_buckets + bucket, bucket, seconds % self.bucket_seconds
+
+    def _ratio(self, row: int, bucket: int) -> float:
+        expected = self.baseline[row, bucket]
+        if math.isnan(expected) or expected <= 0:
+            return math.nan
+        # Pro-rate the full-bucket baseline; clamp so the first seconds don't explode the ratio
+        elapsed = max((self._last_seen[row] + 1) / self.bucket_seconds, 0.2)
+        return float(self._volume[row] / (expected * min(elapsed, 1.0)))
+
+    def update(self, symbol: str, volume: float, timestamp: datetime) -> Optional[Dict[str, Any]]:
+        """Add a tick's volume; returns an analysis dict when the unusual threshold is first crossed"""
+        row = self._row(symbol)
+        slot, bucket, offset = self._position(timestamp)
+
+        if slot != self._slot[row]:
+            previous = self._slot[row]
+            if previous >= 0:
+                previous_bucket = previous % self.n_buckets
+                current = self.baseline[row, previous_bucket]
+                total = self._volume[row]
+                self.baseline[row, previous_bucket] = (
+                    total if math.isnan(current) else current + self.alpha * (total - current)
+                )
+            self._slot[row] = slot
+            self._volume[row] = 0.0
+            self._flagged[row] = False
+
+        self._volume[row] += volume
+        self._last_seen[row] = offset
+
+        ratio = self._ratio(row, bucket)
+        if not math.isnan(ratio) and ratio >= self.unusual_ratio and not self._flagged[row]:
+            self._flagged[row] = True
+            return self.analysis(symbol, timestamp)
+        return None
+
+    def analysis(self, symbol: str, timestamp: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        row = self._rows.get(symbol)
+        if row is None:
+            return None
+
+        timestamp = timestamp or datetime.utcnow()
+        slot, bucket, _ = self._position(timestamp)
+        # A bucket with no ticks yet has zero volume so far
+        current_volume = float(self._volume[row]) if slot == self._slot[row] else 0.0
+        average_volume = self.baseline[row, bucket]
+        ratio = self._ratio(row, bucket) if slot == self._slot[row] else 0.0
+
+        return {
+            "symbol": symbol,
+            "current_volume": int(current_volume),
+            "average_volume": 0.0 if math.isnan(average_volume) else float(average_volume),
+            "volume_ratio": 0.0 if math.isnan(ratio) else round(ratio, 4),
+            "unusual_volume": not math.isnan(ratio) and ratio >= self.unusual_ratio,
+            "timestamp": timestamp,
+        }
+
+    def volume_ratio(self, symbol: str) -> float:
+        row = self._rows.get(symbol)
+        if row is None or self._slot[row] < 0:
+            return math.nan
+        return self._ratio(row, int(self._slot[row] % self.n_buckets))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of the persisted state, cheap enough to take between ticks"""
+        count = len(self.symbols)
+        return {
+            "symbols": np.array(self.symbols, dtype=str),
+            "baseline": self.baseline[:count].copy(),
+            "bucket_minutes": self.bucket_minutes,
+            "timezone": self.timezone,
+        }
+
+    @staticmethod
+    def write(path: str, snapshot: Dict[str, Any]):
+        """Write a snapshot through a temporary file so a crash mid-write keeps the previous one"""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            temporary = f"{path}.tmp"
+            with open(temporary, "wb") as f:
+                np.savez(f, **snapshot)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.error(f"Error saving volume baselines: {e}")
+
+    def save(self, path: str):
+        """Persist baselines so a restart does not lose weeks of history"""
+        self.write(path, self.snapshot())
+
+    def load(self, path: str):
+        if not os.path.exists(path):
+            return
+        try:
+            with np.load(path) as data:
+                if int(data["bucket_minutes"]) != self.bucket_minutes:
+                    logger.warning("Ignoring volume baselines saved with a different bucket size")
+                    return
+                # Files from before exchange-local buckets hold UTC slots
+                saved_timezone = str(data["timezone"]) if "timezone" in data.files else "UTC"
+                if saved_timezone != self.timezone:
+                    logger.warning(f"Ignoring volume baselines bucketed in {saved_timezone}")
+                    return
+                for symbol, baseline in zip(data["symbols"].tolist(), data["baseline"]):
+                    self.baseline[self._row(symbol)] = baseline
+            logger.info(f"Loaded volume baselines for {len(self.symbols)} symbols")
+        except (OSError, KeyError, ValueError) as e:
+            logger.error(f"Error loading volume baselines: {e}")
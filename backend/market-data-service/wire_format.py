@@ -0,0 +1,103 @@
+"""
+Market Data Service Wire Format - Casa de Valores Information System
+Compact msgpack encoding for WebSocket market data with delta updates
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import msgpack
+
+# Negotiated with ?encoding=msgpack or the WebSocket subprotocol below.
+# Ticks are sent as binary frames holding a msgpack map:
+#   i  symbol id (see the "symbol_ids" map in the subscriptions message)
+#   q  per-symbol sequence number (0 for snapshots outside the sequence)
+#   d  present (1) on delta frames: only fields that changed since q - 1
+#   p/c/b/a/h/l/o  price/change/bid/ask/high/low/open as integers / PRICE_SCALE
+#   cp change_percent as an integer / PERCENT_SCALE
+#   v  volume, ts  epoch milliseconds
+# Control and alert messages stay JSON text frames.
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+MSGPACK_SUBPROTOCOL = "casa.msgpack.v1"
+
+PRICE_SCALE = 10_000
+PERCENT_SCALE = 100
+
+PRICE_FIELDS = {
+    "price": "p",
+    "change": "c",
+    "bid": "b",
+    "ask": "a",
+    "high": "h",
+    "low": "l",
+    "open": "o",
+}
+
+def epoch_ms(timestamp: Any) -> int:
+    """Convert an ISO string or datetime (naive values are UTC) to epoch milliseconds"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() * 1000)
+
+def encode_fields(message: Dict[str, Any]) -> Dict[str, int]:
+    """Integer-scaled short-key fields for a market data message"""
+    fields = {}
+    for name, key in PRICE_FIELDS.items():
+        value = message.get(name)
+        if value is not None:
+            fields[key] = int(round(value * PRICE_SCALE))
+    if message.get("change_percent") is not None:
+        fields["cp"] = int(round(message["change_percent"] * PERCENT_SCALE))
+    if message.get("volume") is not None:
+        fields["v"] = int(message["volume"])
+    if message.get("timestamp") is not None:
+        fields["ts"] = epoch_ms(message["timestamp"])
+    return fields
+
+class TickFrame:
+    """One market data update, encoded lazily and at most once per format"""
+
+    __slots__ = ("symbol", "symbol_id", "seq", "message", "fields", "prev_fields", "_text", "_full", "_delta")
+
+    def __init__(
+        self,
+        symbol: str,
+        symbol_id: int,
+        seq: int,
+        message: Dict[str, Any],
+        prev_fields: Optional[Dict[str, int]] = None,
+    ):
+        self.symbol = symbol
+        self.symbol_id = symbol_id
+        self.seq = seq
+        self.message = message
+        self.fields = encode_fields(message)
+        self.prev_fields = prev_fields
+        self._text: Optional[str] = None
+        self._full: Optional[bytes] = None
+        self._delta: Optional[bytes] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.message)
+        return self._text
+
+    def binary(self, last_seq: Optional[int]) -> bytes:
+        """Delta frame if the client holds the previous update, full frame otherwise"""
+        if self.seq and self.prev_fields is not None and last_seq == self.seq - 1:
+            if self._delta is None:
+                changed = {
+                    key: value for key, value in self.fields.items()
+                    if self.prev_fields.get(key) != value
+                }
+                self._delta = msgpack.packb({"i": self.symbol_id, "q": self.seq, "d": 1, **changed})
+            return self._delta
+
+        if self._full is None:
+            self._full = msgpack.packb({"i": self.symbol_id, "q": self.seq, **self.fields})
+        return self._full
@@ -0,0 +1,320 @@
+"""
+Market Data Service WebSocket Benchmark - Casa de Valores Information System
+Local load generator measuring WebSocket fan-out against stand-in Redis and MongoDB
+
+Usage:
+    pip install -r requirements.txt -r requirements-bench.txt
+    python ws_benchmark.py --clients 2000 --symbols 200 --interval 0.1 --duration 30
+
+The service runs in a child process with fakeredis and mongomock-motor in
+place of Redis and MongoDB, so its CPU figure includes the stand-ins. Clients
+are spread over several worker processes so the load generator is not the
+bottleneck.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import msgpack
+import numpy as np
+import psutil
+import websockets
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+MSGPACK_SUBPROTOCOL = "casa.msgpack.v1"
+MAX_LATENCY_SAMPLES = 500000  # per worker, reservoir sampled
+
+def serve(port: int):
+    """Run the service with in-process stand-ins for Redis and MongoDB"""
+    import fakeredis
+    import fakeredis.aioredis
+    import redis.asyncio
+    import uvicorn
+    from mongomock_motor import AsyncMongoMockClient
+
+    server = fakeredis.FakeServer()
+    redis.asyncio.BlockingConnectionPool.from_url = lambda url, **kwargs: redis.asyncio.BlockingConnectionPool(
+        connection_class=fakeredis.aioredis.FakeConnection, server=server, **kwargs
+    )
+
+    sys.path.insert(0, SERVICE_DIR)
+    import main
+    main.AsyncIOMotorClient = lambda *args, **kwargs: AsyncMongoMockClient()
+    # mongomock has no change streams
+    main.watch_market_alerts = lambda loaded_until=None, start_at=None: main.poll_market_alerts(loaded_until)
+    # Per-connection INFO logging would dominate the profile
+    logging.getLogger().setLevel(logging.WARNING)
+
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+class _Recorder:
+    """Message counts and a bounded reservoir of end-to-end latencies"""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.messages = 0
+        self.bytes = 0
+        self.seen = 0
+        self.samples: List[float] = []
+        self.batches = set()  # distinct tick timestamps, i.e. batches the updater produced
+        self._epochs: Dict[str, float] = {}
+
+    def epoch(self, timestamp: str) -> float:
+        # Every tick in a batch shares one timestamp string, so parse each once
+        value = self._epochs.get(timestamp)
+        if value is None:
+            if len(self._epochs) > 10000:
+                self._epochs.clear()
+            value = datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+            self._epochs[timestamp] = value
+        return value
+
+    def record(self, received_at: float, sent_at: Optional[float], size: int):
+        if received_at < self.measure_from:
+            return
+        self.messages += 1
+        self.bytes += size
+        if sent_at is None:
+            return
+        self.seen += 1
+        self.batches.add(sent_at)
+        latency = received_at - sent_at
+        if len(self.samples) < MAX_LATENCY_SAMPLES:
+            self.samples.append(latency)
+        else:
+            slot = random.randrange(self.seen)
+            if slot < MAX_LATENCY_SAMPLES:
+                self.samples[slot] = latency
+
+async def _client(url: str, symbols: List[str], encoding: str, recorder: _Recorder,
+                  connect_limit: asyncio.Semaphore, counters: Dict[str, int]):
+    kwargs = {"subprotocols": [MSGPACK_SUBPROTOCOL]} if encoding == "msgpack" else {}
+    try:
+        async with connect_limit:
+            connection = await websockets.connect(url, max_queue=None, close_timeout=1, **kwargs)
+        counters["connected"] += 1
+    except Exception:
+        counters["failed"] += 1
+        return
+
+    try:
+        if len(symbols) > 1:
+            await connection.send(json.dumps({"action": "subscribe", "symbols": symbols}))
+        async for frame in connection:
+            received_at = time.time()
+            if isinstance(frame, bytes):
+                message = msgpack.unpackb(frame)
+                sent_at = message["ts"] / 1000 if "ts" in message else None
+            else:
+                message = json.loads(frame)
+                if "type" in message:  # subscription acks, alerts and errors are not ticks
+                    continue
+                sent_at = recorder.epoch(message["timestamp"]) if "timestamp" in message else None
+            recorder.record(received_at, sent_at, len(frame))
+        # The server closed the connection before the run ended
+        counters["disconnected"] += 1
+    except websockets.ConnectionClosed:
+        counters["disconnected"] += 1
+    finally:
+        await connection.close()
+
+def _worker(port: int, assignments: List[List[str]], encoding: str, measure_from: float,
+            stop_at: float, results: multiprocessing.Queue):
+    async def run():
+        recorder = _Recorder(measure_from)
+        counters = {"connected": 0, "failed": 0, "disconnected": 0}
+        connect_limit = asyncio.Semaphore(100)
+        tasks = []
+        for symbols in assignments:
+            if len(symbols) == 1:
+                url = f"ws://127.0.0.1:{port}/ws/market-data/{symbols[0]}"
+            else:
+                url = f"ws://127.0.0.1:{port}/ws/market-data"
+            tasks.append(asyncio.create_task(_client(url, symbols, encoding, recorder, connect_limit, counters)))
+
+        # Clients read until the measurement window ends, then are cancelled together
+        await asyncio.sleep(max(0.0, stop_at - time.time()))
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return recorder, counters
+
+    recorder, counters = asyncio.run(run())
+    results.put({
+        "messages": recorder.messages,
+        "bytes": recorder.bytes,
+        "latencies": np.array(recorder.samples),
+        "batches": recorder.batches,
+        **counters,
+    })
+
+async def _wait_for_health(port: int, timeout: float = 60.0, server: Optional[subprocess.Popen] = None) -> Dict[str, Any]:
+    deadline = time.time() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.time() < deadline:
+            # A service that crashed at startup will never answer
+            if server is not None and server.poll() is not None:
+                raise RuntimeError(f"Service exited with code {server.returncode} before becoming healthy")
+            try:
+                async with session.get(f"http://127.0.0.1:{port}/health") as response:
+                    if response.status == 200:
+                        return await response.json()
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError("Service did not become healthy")
+
+def _health(port: int) -> Dict[str, Any]:
+    return asyncio.run(_wait_for_health(port, timeout=10.0))
+
+def _raise_fd_limit(needed: int):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(needed, soft)), hard))
+
+def run_benchmark(args) -> Dict[str, Any]:
+    symbols = [f"BM{index:05d}" for index in range(args.symbols)]
+    # Client i follows a window of symbols so every symbol gets subscribers
+    assignments = [
+        [symbols[(client * args.symbols_per_client + offset) % len(symbols)] for offset in range(args.symbols_per_client)]
+        for client in range(args.clients)
+    ]
+    _raise_fd_limit(args.clients * 2 + 1024)
+
+    workdir = tempfile.mkdtemp(prefix="ws-benchmark-")
+    env = {
+        **os.environ,
+        "MARKET_DATA_SYMBOLS": ",".join(symbols),
+        "MARKET_DATA_UPDATE_INTERVAL": str(args.interval),
+        "MARKET_HOURS_ONLY": "false",
+        "SHARDING_ENABLED": "false",
+        "MAX_SYMBOLS_PER_SUBSCRIPTION": str(max(50, args.symbols_per_client)),
+        "WS_MAX_PENDING_MESSAGES": str(args.max_pending),
+        "TICK_STORE_PATH": os.path.join(workdir, "ticks"),
+        "VOLUME_BASELINE_PATH": os.path.join(workdir, "volume_baselines.npz"),
+        "PYTHONPATH": SERVICE_DIR,
+    }
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "serve", "--port", str(args.port)],
+        cwd=SERVICE_DIR, env=env
+    )
+    try:
+        asyncio.run(_wait_for_health(args.port, server=server))
+        process = psutil.Process(server.pid)
+
+        start = time.time()
+        measure_from = start + args.warmup
+        stop_at = measure_from + args.duration
+
+        results: multiprocessing.Queue = multiprocessing.Queue()
+        workers = []
+        for index in range(args.workers):
+            share = assignments[index::args.workers]
+            if share:
+                worker = multiprocessing.Process(
+                    target=_worker, args=(args.port, share, args.encoding, measure_from, stop_at, results)
+                )
+                worker.start()
+                workers.append(worker)
+
+        # Sample server CPU and memory only inside the measurement window
+        while time.time() < measure_from:
+            time.sleep(0.1)
+        before = _health(args.port)["websockets"]
+        process.cpu_percent(None)
+        cpu_samples, rss_samples = [], []
+        while time.time() < stop_at:
+            time.sleep(1.0)
+            cpu_samples.append(process.cpu_percent(None))
+            rss_samples.append(process.memory_info().rss)
+        after = _health(args.port)["websockets"]
+
+        outcomes = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = np.concatenate([outcome["latencies"] for outcome in outcomes]) * 1000
+    delivered = sum(outcome["messages"] for outcome in outcomes)
+    # Measured against batches actually produced, since the updater may not sustain the requested interval
+    batches = len(set().union(*(outcome["batches"] for outcome in outcomes)))
+    expected = args.clients * args.symbols_per_client * batches
+    percentiles = (50, 90, 99, 99.9)
+    return {
+        "config": {
+            "clients": args.clients,
+            "symbols": args.symbols,
+            "symbols_per_client": args.symbols_per_client,
+            "tick_interval_seconds": args.interval,
+            "duration_seconds": args.duration,
+            "encoding": args.encoding,
+        },
+        "clients_connected": sum(outcome["connected"] for outcome in outcomes),
+        "clients_failed": sum(outcome["failed"] for outcome in outcomes),
+        "clients_disconnected": sum(outcome["disconnected"] for outcome in outcomes),
+        "tick_batches_per_second": round(batches / args.duration, 2),
+        "messages_delivered": delivered,
+        "messages_per_second": round(delivered / args.duration, 1),
+        "delivery_ratio": round(delivered / expected, 4) if expected else None,
+        "megabytes_per_second": round(sum(outcome["bytes"] for outcome in outcomes) / args.duration / 1e6, 3),
+        "latency_ms": {
+            f"p{p}": round(float(np.percentile(latencies, p)), 2) if len(latencies) else None
+            for p in percentiles
+        },
+        "messages_conflated": after["messages_conflated"] - before["messages_conflated"],
+        "messages_dropped": after["messages_dropped"] - before["messages_dropped"],
+        "server_cpu_percent": {
+            "mean": round(float(np.mean(cpu_samples)), 1) if cpu_samples else None,
+            "max": round(float(np.max(cpu_samples)), 1) if cpu_samples else None,
+        },
+        "server_rss_mb": round(max(rss_samples) / 1e6, 1) if rss_samples else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket fan-out benchmark for the market data service")
+    subcommands = parser.add_subparsers(dest="command")
+    serve_parser = subcommands.add_parser("serve", help="run the service with stand-in Redis and MongoDB")
+    serve_parser.add_argument("--port", type=int, default=8765)
+
+    parser.add_argument("--clients", type=int, default=1000, help="WebSocket connections to open")
+    parser.add_argument("--symbols", type=int, default=100, help="size of the ticking symbol universe")
+    parser.add_argument("--symbols-per-client", type=int, default=1,
+                        help="1 uses /ws/market-data/{symbol}; more uses the multiplexed endpoint")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between tick batches")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds to connect and settle before measuring")
+    parser.add_argument("--encoding", choices=("json", "msgpack"), default="json")
+    parser.add_argument("--max-pending", type=int, default=1000, help="server per-connection send queue bound")
+    parser.add_argument("--workers", type=int, default=max(1, min(8, (os.cpu_count() or 2) - 1)),
+                        help="client processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.port)
+        return
+
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Handles portfolio management, performance analytics, and asset allocation
 
 from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import redis
@@ -17,11 +18,11 @@ from contextlib import asynccontextmanager
 from decimal import Decimal
 import httpx
 
-from models import Portfolio, Holding, PerformanceMetric, AssetAllocation
+from models import Portfolio, Holding, PerformanceMetric, AssetAllocation, Watchlist, WatchlistItem
 from database import get_db, engine, Base
 from schemas import (
     PortfolioCreateRequest, PortfolioResponse, HoldingResponse,
-    PerformanceResponse, AssetAllocationResponse, RebalanceRequest
+    PerformanceResponse, AssetAllocationResponse, RebalanceRequest, WatchlistResponse
 )
 
 # Configure logging
@@ -417,6 +418,41 @@ async def delete_portfolio(
     
     return {"message": "Portfolio deleted successfully"}
 
+@app.get("/api/v1/watchlists/{watchlist_id}", response_model=WatchlistResponse)
+async def get_watchlist(
+    watchlist_id: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """Get a watchlist with its symbols (own or public)"""
+    user_id = get_current_user_id(request)
+    
+    watchlist = db.query(Watchlist).filter(
+        Watchlist.id == watchlist_id,
+        or_(Watchlist.user_id == user_id, Watchlist.is_public.is_(True))
+    ).first()
+    
+    if not watchlist:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Watchlist not found"
+        )
+    
+    items = db.query(WatchlistItem).filter(
+        WatchlistItem.watchlist_id == watchlist_id
+    ).order_by(WatchlistItem.added_at).all()
+    
+    return WatchlistResponse(
+        id=watchlist.id,
+        user_id=watchlist.user_id,
+        name=watchlist.name,
+        description=watchlist.description,
+        is_public=watchlist.is_public,
+        symbols=[item.symbol for item in items],
+        created_at=watchlist.created_at,
+        updated_at=watchlist.updated_at
+    )
+
 # Health check
 @app.get("/health")
 async def health_check():